@@ -1,3 +1,27 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Camera, Zone, ZoneEvent
+
+
+class ZoneInline(admin.TabularInline):
+    model = Zone
+    extra = 0
+
+
+@admin.register(Camera)
+class CameraAdmin(admin.ModelAdmin):
+    list_display = ['camera_id', 'name']
+    inlines = [ZoneInline]
+
+
+@admin.register(Zone)
+class ZoneAdmin(admin.ModelAdmin):
+    list_display = ['name', 'camera', 'updated_at']
+    list_filter = ['camera']
+
+
+@admin.register(ZoneEvent)
+class ZoneEventAdmin(admin.ModelAdmin):
+    list_display = ['timestamp', 'zone', 'track_id', 'kind', 'duration']
+    list_filter = ['kind', 'zone__camera', 'zone']
+    date_hierarchy = 'timestamp'
@@ -4,3 +4,27 @@ from django.apps import AppConfig
 class VisionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.vision'
+
+    def ready(self):
+        from django.conf import settings
+
+        from . import zones  # noqa: F401, connects the signal receivers.
+        from .capture import CAPTURES
+        from .events import EVENTS
+        from .src.bus import make_bus
+        from .src.stream import STREAMS
+        from .zones import ZONES
+
+        STREAMS.idle_timeout = getattr(
+            settings, 'VISION_STREAM_IDLE_TIMEOUT', STREAMS.idle_timeout)
+        STREAMS.dwell_grace_period = getattr(
+            settings, 'VISION_DWELL_GRACE_PERIOD', STREAMS.dwell_grace_period)
+        STREAMS.on_dwell_events = EVENTS.put
+        STREAMS.bus = make_bus(
+            getattr(settings, 'VISION_FRAME_BUS', 'local'),
+            **getattr(settings, 'VISION_FRAME_BUS_OPTIONS', {}))
+        STREAMS.zones = ZONES.get
+        STREAMS.on_collect = lambda stream: ZONES.evict(stream.name)
+        # 버스를 공유하면 워커마다 캡처하지 않고, 'manage.py capture'
+        # 프로세스 하나가 캡처한다.
+        CAPTURES.enabled = not STREAMS.bus.is_shared
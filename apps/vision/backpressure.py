@@ -0,0 +1,91 @@
+import asyncio
+from functools import partial
+
+
+class Producer():
+
+    """
+    Twisted의 IPushProducer. 응답 하나에 등록하면 Twisted가 송신 버퍼
+    가 찰 때 pauseProducing()을, 비워질 때 resumeProducing()을 호출
+    한다. writable은 보내도 되는 동안 설정되어 있다.
+    """
+
+    def __init__(self) -> None:
+        self.writable = asyncio.Event()
+        self.writable.set()
+
+    def pauseProducing(self) -> None:
+        self.writable.clear()
+
+    def resumeProducing(self) -> None:
+        self.writable.set()
+
+    def stopProducing(self) -> None:
+        self.writable.set()
+
+
+def twisted_request(send):
+
+    """
+    Daphne는 send를 partial(server.handle_reply, request)로 넘긴다.
+    send에서 Twisted 요청(http.Request)을 찾지 못하면 None을 반환한다.
+    """
+
+    if not isinstance(send, partial) or not send.args:
+        return None
+    request = send.args[0]
+    if not hasattr(request, 'registerProducer'):
+        return None
+    return request
+
+
+class BackpressureMiddleware():
+
+    """
+    ASGI http 애플리케이션을 감싸, 응답 본문의 send()가 클라이언트에
+    실제로 전달될 때까지 기다리게 한다.
+
+    Daphne의 send()는 클라이언트가 느려도 기다리지 않고 Twisted의 송신
+    버퍼에 쌓는다. 따라서 MJPEG처럼 끝나지 않는 응답은 연결마다 메모리
+    가 계속 늘고, 전송 시간으로 화질을 정하는 QualityController는 밀림을
+    알 수 없다. 이 미들웨어는 응답마다 Producer를 등록하여, 송신 버퍼가
+    차 있는 동안 send()가 반환하지 않게 한다. 연결당 밀린 데이터는
+    Twisted의 버퍼 크기(64KiB)와 청크 하나로 제한된다.
+
+    send()가 이미 송신 버퍼를 기다리는 서버(uvicorn, hypercorn)에서는
+    아무것도 하지 않는다.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        request = twisted_request(send) if scope['type'] == 'http' else None
+        if request is None:
+            return await self.app(scope, receive, send)
+
+        producer = Producer()
+
+        def unregister():
+            if (request.producer is producer
+                    and request.channel is not None):
+                request.unregisterProducer()
+
+        async def send_with_backpressure(message):
+            if message['type'] == 'http.response.start':
+                try:
+                    request.registerProducer(producer, True)
+                except (RuntimeError, ValueError):
+                    # 같은 연결의 다른 응답이 등록해 두었다.
+                    pass
+            elif (message['type'] == 'http.response.body'
+                    and not message.get('more_body', False)):
+                unregister()
+            await send(message)
+            if request.producer is producer:
+                await producer.writable.wait()
+
+        try:
+            await self.app(scope, receive, send_with_backpressure)
+        finally:
+            unregister()
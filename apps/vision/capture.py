@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .ingest import ingest
+from .models import Camera
+from .src.capture import CaptureThread
+from .src.codec import get_codec
+from .src.envelope import BOX_DIM, KPT_DIM, pack
+from .src.stream import STREAMS
+
+
+# 서버 측 캡처에는 추론 결과가 없다.
+NO_BOXES = np.zeros((0, BOX_DIM), dtype=np.float32)
+NO_KPTSS = np.zeros((0, 0, KPT_DIM), dtype=np.float32)
+
+
+class Feed():
+
+    """
+    캡처 스레드가 읽은 프레임을 이벤트 루프의 ingest()로 넘긴다. 프레임은
+    캡처 스레드에서 JPEG으로 인코딩되고 envelope로 패킹되므로, 루프는
+    웹소켓으로 받은 프레임과 똑같이 처리한다. 루프가 밀리면 넘기지
+    못한 프레임은 최신 프레임으로 덮어쓰인다.
+
+    ingest()는 피드마다 하나인 태스크가 차례로 호출하며, 태스크는 넘길
+    프레임이 없으면 끝나고 다음 프레임에서 다시 만들어진다. 웹소켓
+    연결마다 프레임을 차례로 처리하는 FrameConsumer와 같다.
+
+    Args:
+        - camera_id: 카메라 id.
+        - loop: 이벤트 루프.
+        - codec: JPEG 코덱 이름. get_codec 참고.
+    """
+
+    def __init__(
+            self,
+            camera_id: str,
+            loop: asyncio.AbstractEventLoop,
+            codec: str = 'auto'
+        ) -> None:
+
+        self.camera_id = camera_id
+        self._loop = loop
+        self._codec = get_codec(codec)
+        self._seq = 0
+        self._pending = None
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def __call__(self, frame: np.ndarray, timestamp: float) -> None:
+        # 캡처 스레드에서 호출된다.
+        self._seq += 1
+        height, width = frame.shape[:2]
+        data = pack(
+            self._codec.encode(frame), NO_BOXES, NO_KPTSS, self.camera_id,
+            timestamp, self._seq, width, height)
+        with self._lock:
+            is_scheduled = self._pending is not None
+            self._pending = data
+        if not is_scheduled:
+            try:
+                self._loop.call_soon_threadsafe(self._deliver)
+            except RuntimeError:
+                pass  # 이벤트 루프가 닫혔다.
+
+    def _deliver(self) -> None:
+        # 태스크가 실행 중이면 다음 차례에 _pending을 가져간다.
+        if self._task is None or self._task.done():
+            self._task = self._loop.create_task(self._drain())
+
+    async def _drain(self) -> None:
+        while True:
+            with self._lock:
+                data, self._pending = self._pending, None
+            if data is None:
+                return
+            try:
+                await ingest(STREAMS.get(self.camera_id), data)
+            except Exception:
+                logging.exception(
+                    f'{self.camera_id}: failed to ingest a captured frame.')
+
+
+class CaptureManager():
+
+    """
+    Camera.source가 있는 카메라의 서버 측 캡처. 캡처는 시청자 수와
+    무관하게 카메라마다 하나이며, 프레임은 웹소켓으로 받은 프레임과
+    같은 파이프라인(ingest)을 거친다. 따라서 시청자가 없어도 존별 체류
+    이벤트가 기록되며, 캡처 중인 스트림은 계속 프레임을 받으므로
+    정리되지 않는다.
+
+    start()가 호출되면(CaptureMiddleware) source가 있는 모든 카메라의
+    캡처를 시작하고, 다른 프로세스에서 수정된 Camera를 반영하도록
+    refresh_interval마다 다시 조회한다. 같은 프로세스에서 Camera가
+    수정되면 signal로 곧바로 반영된다.
+
+    Args:
+        - target_size, fps, min_backoff, max_backoff: CaptureThread 참고.
+        - codec: JPEG 코덱 이름. get_codec 참고.
+        - refresh_interval: Camera를 다시 조회하는 간격. (초)
+    """
+
+    def __init__(
+            self,
+            target_size: Optional[Tuple[int, int]] = None,
+            fps: Optional[float] = None,
+            min_backoff: float = 1.0,
+            max_backoff: float = 30.0,
+            codec: str = 'auto',
+            refresh_interval: float = 5.0
+        ) -> None:
+
+        self.enabled = False
+        self.target_size = target_size
+        self.fps = fps
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.codec = codec
+        self.refresh_interval = refresh_interval
+        self._threads: Dict[str, CaptureThread] = {}
+        self._loop = None
+        self._sync = None
+
+    @property
+    def cameras(self):
+        return set(self._threads)
+
+    def start(self) -> None:
+
+        """
+        enabled가 참이면 캡처를 시작한다. 이벤트 루프에서 호출해야 하며,
+        두 번째 호출부터는 아무것도 하지 않는다.
+        """
+
+        if self.enabled and self._sync is None:
+            self._sync = asyncio.create_task(self.sync_forever())
+
+    async def sync_forever(self) -> None:
+        while True:
+            try:
+                await self.sync()
+            except Exception:
+                logging.exception('failed to load the capture sources.')
+            await asyncio.sleep(self.refresh_interval)
+
+    async def sync(self) -> None:
+
+        """ source가 있는 모든 카메라를 조회하여 캡처를 맞춘다. """
+
+        sources = await database_sync_to_async(self._fetch)()
+        for camera_id in self.cameras - sources.keys():
+            self.set_source(camera_id, '')
+        for camera_id, source in sources.items():
+            self.set_source(camera_id, source)
+
+    @staticmethod
+    def _fetch() -> Dict[str, str]:
+        cameras = Camera.objects.exclude(source='')
+        return dict(cameras.values_list('camera_id', 'source'))
+
+    def set_source(self, camera_id: str, source: str) -> None:
+
+        """
+        카메라의 캡처를 source에 맞춘다. source가 바뀌었으면 캡처를 다시
+        시작하고, 빈 문자열이면 멈춘다. 이벤트 루프에서 호출해야 한다.
+        """
+
+        self._loop = asyncio.get_running_loop()
+        thread = self._threads.get(camera_id)
+        if thread is not None and thread.source == source:
+            return
+        if thread is not None:
+            thread.stop()
+            del self._threads[camera_id]
+        if source:
+            thread = self._threads[camera_id] = CaptureThread(
+                source, Feed(camera_id, self._loop, self.codec),
+                self.target_size, self.fps, self.min_backoff,
+                self.max_backoff)
+            thread.start()
+
+    def notify(self, camera_id: str, source: str) -> None:
+
+        """
+        Camera가 수정되었음을 알린다. 어느 스레드에서나 호출할 수 있다.
+        이 프로세스에서 캡처가 시작된 뒤에만 반영한다.
+        """
+
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self.set_source, camera_id, source)
+
+    def stop(self) -> None:
+        if self._sync is not None:
+            self._sync.cancel()
+            self._sync = None
+        for thread in self._threads.values():
+            thread.stop()
+        self._threads.clear()
+
+
+CAPTURES = CaptureManager(
+    getattr(settings, 'VISION_CAPTURE_SIZE', None),
+    getattr(settings, 'VISION_CAPTURE_FPS', None),
+    getattr(settings, 'VISION_CAPTURE_MIN_BACKOFF', 1.0),
+    getattr(settings, 'VISION_CAPTURE_MAX_BACKOFF', 30.0),
+    getattr(settings, 'VISION_JPEG_CODEC', 'auto'),
+    getattr(settings, 'VISION_CAPTURE_REFRESH', 5.0))
+
+
+class CaptureMiddleware():
+
+    """
+    ASGI 애플리케이션을 감싸, 서버가 시작될 때 서버 측 캡처를
+    시작하고 종료될 때 멈춘다. (lifespan) lifespan을 보내지 않는
+    서버(Daphne)에서는 첫 연결에서 시작한다.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        CAPTURES.start()
+        if scope['type'] != 'lifespan':
+            return await self.app(scope, receive, send)
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                CAPTURES.stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+@receiver(post_save, sender=Camera)
+def update_capture(sender, instance, **kwargs):
+    CAPTURES.notify(instance.camera_id, instance.source)
+
+
+@receiver(post_delete, sender=Camera)
+def stop_capture(sender, instance, **kwargs):
+    CAPTURES.notify(instance.camera_id, '')
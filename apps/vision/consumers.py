@@ -1,26 +1,67 @@
 import asyncio
 
 from channels.generic.websocket import AsyncWebsocketConsumer
-#import cv2
-#import numpy as np
 
-QUEUE = asyncio.Queue(maxsize=1)
+from .ingest import ingest
+from .src.stream import STREAMS
 
 
 class FrameConsumer(AsyncWebsocketConsumer):
 
     async def connect(self):
+        camera_id = self.scope['url_route']['kwargs']['camera_id']
+        self.stream = STREAMS.get(camera_id)
+        self.stream.attach()
         await self.accept()
 
     async def disconnect(self, close_code):
-        pass
+        self.stream.detach()
 
     async def receive(self, text_data=None, bytes_data=None):
         if bytes_data:
-            #frame = np.frombuffer(bytes_data, dtype=np.uint8)
-            #frame = cv2.imdecode(frame, cv2.IMREAD_ANYCOLOR)
-            #cv2.rectangle(frame, (10, 10), (100, 100), (0, 255, 0), 1)
-            if QUEUE.full():
-                await QUEUE.get()
-            #await QUEUE.put(frame)
-            await QUEUE.put(bytes_data)
+            await ingest(self.stream, bytes_data)
+
+
+class OverlayConsumer(AsyncWebsocketConsumer):
+
+    """
+    수신된 envelope를 가공 없이 브라우저로 전달한다. 오버레이는 브라우저
+    에서 캔버스에 그려지므로 서버는 디코딩/플로팅/인코딩을 하지 않는다.
+
+    Daphne의 send()는 클라이언트가 밀려도 기다리지 않고 송신 버퍼에
+    쌓으므로, 흐름 제어는 확인 응답으로 한다. 브라우저는 프레임을
+    받을 때마다 'ack' 텍스트 메시지를 보내며, 응답받지 못한 프레임이
+    max_in_flight개이면 응답이 올 때까지 보내지 않는다. 그동안 도착한
+    프레임은 건너뛰고, 응답이 오면 최신 프레임을 보낸다.
+    """
+
+    # 확인 응답 없이 보낼 수 있는 프레임 수.
+    max_in_flight = 2
+
+    async def connect(self):
+        camera_id = self.scope['url_route']['kwargs']['camera_id']
+        self.stream = STREAMS.get(camera_id)
+        self.stream.attach()
+        self.in_flight = 0
+        self.acked = asyncio.Event()
+        await self.accept()
+        self.relay = asyncio.create_task(self.relay_frames())
+
+    async def disconnect(self, close_code):
+        self.relay.cancel()
+        self.stream.detach()
+
+    async def receive(self, text_data=None, bytes_data=None):
+        if text_data == 'ack' and self.in_flight:
+            self.in_flight -= 1
+            self.acked.set()
+
+    async def relay_frames(self):
+        seq = 0
+        while True:
+            while self.in_flight >= self.max_in_flight:
+                self.acked.clear()
+                await self.acked.wait()
+            seq, frame = await self.stream.frames.wait(seq)
+            self.in_flight += 1
+            await self.send(bytes_data=frame.data)
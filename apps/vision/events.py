@@ -0,0 +1,107 @@
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import IntegrityError
+
+from .models import Zone, ZoneEvent
+from .src.timer import DwellEvent
+
+
+class EventWriter():
+
+    """
+    DwellEvent를 모아 ZoneEvent로 일괄 저장한다. put()은 버퍼에 추가만
+    하므로 스트리밍 경로는 DB를 기다리지 않는다. batch_size개가 쌓이거나
+    첫 이벤트 이후 flush_interval이 지나면 백그라운드 태스크가
+    bulk_create로 저장한다. 태스크는 버퍼가 빌 때까지만 살아 있다.
+
+    DB가 밀려 버퍼가 max_pending을 넘으면 오래된 이벤트부터 버린다.
+    프로세스가 종료될 때 버퍼에 남은 이벤트는 저장되지 않는다.
+
+    Args:
+        - batch_size: 한 번에 저장할 최대 이벤트 수.
+        - flush_interval: 저장 전 이벤트를 모으는 최대 시간. (초)
+        - max_pending: 버퍼에 보관할 최대 이벤트 수.
+    """
+
+    def __init__(
+            self,
+            batch_size: int = 500,
+            flush_interval: float = 1.0,
+            max_pending: int = 100000
+        ) -> None:
+
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._pending = deque(maxlen=max_pending)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def put(self, events: List[DwellEvent]) -> None:
+        overflow = len(self._pending) + len(events) - self._pending.maxlen
+        if overflow > 0:
+            self.dropped += overflow
+            logging.warning(f'dropped {overflow} zone events.')
+        self._pending.extend(events)
+
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> None:
+        while self._pending:
+            n = min(len(self._pending), self.batch_size)
+            batch = [self._pending.popleft() for _ in range(n)]
+            try:
+                await database_sync_to_async(self._write)(batch)
+            except Exception:
+                logging.exception(f'failed to write {n} zone events.')
+
+    async def _run(self) -> None:
+        try:
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+        finally:
+            self._task = None
+
+    @staticmethod
+    def _write(batch: List[DwellEvent]) -> None:
+        events = [
+            ZoneEvent(
+                zone_id=event.zone_id,
+                track_id=event.track_id,
+                kind=event.kind,
+                timestamp=datetime.fromtimestamp(
+                    event.timestamp, tz=timezone.utc),
+                duration=event.duration)
+            for event in batch]
+        try:
+            ZoneEvent.objects.bulk_create(events)
+        except IntegrityError:
+            # 저장 전에 존이 삭제되었다. 남은 존의 이벤트만 저장한다.
+            zone_ids = set(Zone.objects.filter(
+                pk__in={event.zone_id for event in events},
+            ).values_list('pk', flat=True))
+            ZoneEvent.objects.bulk_create(
+                [event for event in events if event.zone_id in zone_ids])
+
+
+EVENTS = EventWriter(
+    batch_size=getattr(settings, 'VISION_EVENT_BATCH_SIZE', 500),
+    flush_interval=getattr(settings, 'VISION_EVENT_FLUSH_INTERVAL', 1.0),
+    max_pending=getattr(settings, 'VISION_EVENT_MAX_PENDING', 100000))
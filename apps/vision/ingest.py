@@ -0,0 +1,52 @@
+import logging
+import time
+
+from .src.envelope import EnvelopeError, unpack
+from .src.stream import STREAMS, Stream
+from .zones import ZONES
+
+
+# 버스 게시 실패는 스트림마다 이 간격(초)에 한 번만 로그로 남긴다.
+BUS_ERROR_LOG_INTERVAL = 10.0
+
+
+async def ingest(stream: Stream, data: bytes) -> None:
+
+    """
+    envelope 메시지 하나를 스트림에 게시한다. 존별 체류 시간을
+    갱신하고, 지표를 기록하며, 프레임 버스로 다른 워커에도 전달한다.
+    웹소켓 수신(FrameConsumer)과 서버 측 캡처(CaptureManager)가 함께
+    사용한다.
+    """
+
+    started_at = time.perf_counter()
+    metrics = stream.metrics
+    metrics.frames_received += 1
+    try:
+        frame = unpack(data)
+    except EnvelopeError as e:
+        metrics.frames_rejected += 1
+        logging.warning(f'{stream.name}: dropped frame. {e}')
+        return
+    stream.zones = ZONES.get(stream.name)
+    frame.occupancy = stream.dwell.update(
+        frame.boxes, stream.zones, frame.width, frame.height)
+    # 슬롯에는 최신 프레임 하나만 남으며, 이전 프레임은
+    # 덮어쓰인다. (기존 maxsize=1 큐의 drop-oldest 동작)
+    stream.publish(frame)
+    if STREAMS.bus is not None:
+        # 다른 워커의 시청자에게도 전달한다. 버스에 문제가 있어도 이
+        # 워커의 스트림에는 이미 게시되었으므로 생산자 연결은 유지한다.
+        try:
+            await STREAMS.bus.publish(stream.name, frame)
+        except Exception as e:
+            metrics.bus_errors += 1
+            now = time.monotonic()
+            logged_at = stream.bus_error_logged_at
+            if logged_at is None or now - logged_at > BUS_ERROR_LOG_INTERVAL:
+                stream.bus_error_logged_at = now
+                logging.warning(
+                    f'{stream.name}: failed to publish to the frame bus'
+                    f' ({metrics.bus_errors} so far). {e!r}')
+    metrics.observe('ingest', time.perf_counter() - started_at)
+    metrics.latency['ingest'].record(time.time() - frame.timestamp)
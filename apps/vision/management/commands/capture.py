@@ -0,0 +1,25 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from ...capture import CAPTURES
+from ...src.stream import STREAMS
+
+
+class Command(BaseCommand):
+    help = ('Capture every camera that has a source in this process and '
+            'publish the frames to the frame bus. With a shared '
+            'VISION_FRAME_BUS, run one of these instead of capturing in '
+            'the ASGI workers.')
+
+    def handle(self, *args, **options):
+        if not STREAMS.bus.is_shared:
+            self.stderr.write(
+                'VISION_FRAME_BUS is not shared, so no other process will '
+                'receive the frames captured here.')
+        try:
+            asyncio.run(CAPTURES.sync_forever())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            CAPTURES.stop()
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:50
+
+import apps.vision.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Camera',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('camera_id', models.SlugField(max_length=64, unique=True)),
+                ('name', models.CharField(blank=True, max_length=128)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Zone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64)),
+                ('points', models.JSONField(help_text='Polygon vertices as [[x, y], ...], normalized to the frame size (0 ~ 1).', validators=[apps.vision.models.validate_polygon])),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('camera', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='zones', to='vision.camera')),
+            ],
+            options={
+                'ordering': ['camera', 'pk'],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vision', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZoneEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('track_id', models.BigIntegerField()),
+                ('kind', models.CharField(choices=[('enter', 'Enter'), ('exit', 'Exit')], max_length=5)),
+                ('timestamp', models.DateTimeField(help_text='When the track entered the zone, or was last seen inside it for exit events.')),
+                ('duration', models.FloatField(blank=True, help_text='Seconds spent in the zone. Exit events only.', null=True)),
+                ('zone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='vision.zone')),
+            ],
+            options={
+                'ordering': ['-timestamp'],
+                'indexes': [models.Index(fields=['zone', 'timestamp'], name='vision_zone_zone_id_72f600_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vision', '0002_zoneevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='camera',
+            name='source',
+            field=models.CharField(blank=True, help_text='RTSP URL or video file path to capture on the server. Leave blank for cameras that send frames over the websocket.', max_length=512),
+        ),
+    ]
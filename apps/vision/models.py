@@ -1,3 +1,84 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 
-# Create your models here.
+
+class Camera(models.Model):
+    camera_id = models.SlugField(max_length=64, unique=True)
+    name = models.CharField(max_length=128, blank=True)
+    source = models.CharField(
+        max_length=512, blank=True,
+        help_text=('RTSP URL or video file path to capture on the server. '
+                   'Leave blank for cameras that send frames over the '
+                   'websocket.'))
+
+    def __str__(self):
+        return self.name or self.camera_id
+
+
+def validate_polygon(points):
+    is_valid = (
+        isinstance(points, list)
+        and len(points) >= 3
+        and all(isinstance(point, list)
+                and len(point) == 2
+                and all(isinstance(v, (int, float)) and 0 <= v <= 1
+                        for v in point)
+                for point in points))
+    if not is_valid:
+        raise ValidationError(
+            'Enter at least 3 points as [[x, y], ...], '
+            'with x and y normalized to the frame size (0 ~ 1).')
+
+
+class Zone(models.Model):
+    camera = models.ForeignKey(
+        Camera, on_delete=models.CASCADE, related_name='zones')
+    name = models.CharField(max_length=64)
+    points = models.JSONField(
+        validators=[validate_polygon],
+        help_text=('Polygon vertices as [[x, y], ...], normalized to the '
+                   'frame size (0 ~ 1).'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['camera', 'pk']
+
+    def __str__(self):
+        return f'{self.camera} / {self.name}'
+
+
+class ZoneEventQuerySet(models.QuerySet):
+
+    def total_duration(self):
+
+        """ exit 이벤트의 체류 시간을 합하여, 존에 머문 총 시간(초)을 반환한다. """
+
+        total = self.filter(kind=ZoneEvent.EXIT).aggregate(
+            total=models.Sum('duration'))['total']
+        return total or 0.0
+
+
+class ZoneEvent(models.Model):
+    ENTER = 'enter'
+    EXIT = 'exit'
+    KIND_CHOICES = [(ENTER, 'Enter'), (EXIT, 'Exit')]
+
+    zone = models.ForeignKey(
+        Zone, on_delete=models.CASCADE, related_name='events')
+    track_id = models.BigIntegerField()
+    kind = models.CharField(max_length=5, choices=KIND_CHOICES)
+    timestamp = models.DateTimeField(
+        help_text=('When the track entered the zone, or was last seen '
+                   'inside it for exit events.'))
+    duration = models.FloatField(
+        null=True, blank=True,
+        help_text='Seconds spent in the zone. Exit events only.')
+
+    objects = ZoneEventQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-timestamp']
+        indexes = [models.Index(fields=['zone', 'timestamp'])]
+
+    def __str__(self):
+        return f'{self.zone} / {self.track_id} {self.kind}'
@@ -2,5 +2,6 @@ from django.urls import path
 from . import consumers
 
 websocket_urlpatterns = [
-    path('ws/stream/', consumers.FrameConsumer.as_asgi()),
+    path('ws/stream/<str:camera_id>/', consumers.FrameConsumer.as_asgi()),
+    path('ws/overlay/<str:camera_id>/', consumers.OverlayConsumer.as_asgi()),
 ]
\ No newline at end of file
@@ -0,0 +1,380 @@
+"""
+워커 프로세스 사이에 프레임을 전달하는 프레임 버스.
+
+생산자의 웹소켓은 ASGI 워커 하나에만 연결되므로, 다른 워커의
+시청자가 같은 카메라를 보려면 프레임이 워커 사이를 오가야 한다.
+수신한 워커(FrameConsumer)는 존별 체류 정보를 계산한 뒤 프레임을
+자신의 Stream과 버스에 함께 게시하고, 다른 워커들은 버스에서 받은
+프레임을 자신의 Stream에 게시한다. 렌더링과 시청자 쪽 코드는 어느
+워커에서 프레임을 받았는지 알 필요가 없다.
+
+체류 시간 트래킹과 이벤트 저장은 프레임을 수신한 워커에서만
+이루어지며, 버스에는 계산된 체류 정보가 함께 실린다.
+
+버스 메시지는 다음과 같이 구성된다.
+
+    ┌──────────────────────────────┐
+    │ header (28 bytes)            │ MESSAGE 참고
+    ├──────────────────────────────┤
+    │ envelope (envelope_len)      │ 수신된 원본 메시지
+    ├──────────────────────────────┤
+    │ zone ids (Z,) int64          │ 존이 없으면 Z = 0
+    │ inside (N, Z) uint8          │
+    │ elapsed (N, Z) float32       │
+    └──────────────────────────────┘
+
+백엔드:
+    - LocalBus: 단일 프로세스. 아무것도 전달하지 않는다.
+    - SharedMemoryBus: 같은 호스트의 여러 워커. 카메라마다 ByteRing.
+    - RedisBus: 여러 호스트. Redis pub/sub.
+
+        $ pip install redis
+"""
+
+
+import asyncio
+import hashlib
+import logging
+import struct
+import uuid
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from .envelope import EnvelopeError, Frame, unpack
+from .ring import ByteRing
+from .timer import Occupancy
+from .zones import ZoneMask
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+
+# 메시지를 보낸 프로세스. 자신이 보낸 메시지는 다시 게시하지 않는다.
+ORIGIN = uuid.uuid4().bytes
+
+# origin, envelope_len, n_zones, n_boxes
+MESSAGE = struct.Struct('<16sIII')
+
+ZoneSource = Callable[[str], Optional[ZoneMask]]
+
+
+def encode(frame: Frame) -> bytes:
+
+    """ 체류 정보가 채워진 프레임을 버스 메시지로 패킹한다. """
+
+    occupancy = frame.occupancy
+    if occupancy is None:
+        header = MESSAGE.pack(ORIGIN, len(frame.data), 0, len(frame.boxes))
+        return b''.join([header, frame.data])
+
+    header = MESSAGE.pack(
+        ORIGIN, len(frame.data), len(occupancy.zones), len(frame.boxes))
+    return b''.join([
+        header, frame.data,
+        np.asarray(occupancy.zones.ids, dtype='<i8').tobytes(),
+        np.ascontiguousarray(occupancy.inside, dtype=np.uint8).tobytes(),
+        np.ascontiguousarray(occupancy.elapsed, dtype='<f4').tobytes()])
+
+
+def decode(
+        data: bytes,
+        zones: Optional[ZoneMask] = None
+    ) -> Tuple[bytes, Frame]:
+
+    """
+    버스 메시지를 (origin, 프레임)으로 파싱한다. 형식이 맞지 않으면
+    EnvelopeError를 발생시킨다.
+
+    Args:
+        - zones: 이 프로세스에 캐시된 카메라의 존 마스크. 메시지의 존
+                 id와 같을 때만 체류 정보가 복원된다. 존이 수정된
+                 직후처럼 다르면 체류 정보 없이 반환된다.
+    """
+
+    if len(data) < MESSAGE.size:
+        msg = f'Bus message is shorter than the header.:{len(data)}'
+        raise EnvelopeError(msg)
+
+    origin, envelope_len, n_zones, n_boxes = MESSAGE.unpack_from(data)
+    offset = MESSAGE.size
+    frame = unpack(data[offset:offset + envelope_len])
+    if not n_zones or zones is None:
+        return origin, frame
+
+    offset += envelope_len
+    ids = np.frombuffer(data, '<i8', n_zones, offset)
+    offset += ids.nbytes
+    inside = np.frombuffer(data, np.uint8, n_boxes * n_zones, offset)
+    offset += inside.nbytes
+    elapsed = np.frombuffer(data, '<f4', n_boxes * n_zones, offset)
+    if ids.tolist() == list(zones.ids):
+        frame.occupancy = Occupancy(
+            zones,
+            inside.reshape(n_boxes, n_zones).view(bool),
+            elapsed.reshape(n_boxes, n_zones))
+    return origin, frame
+
+
+class LocalBus():
+
+    """ 단일 프로세스용 버스. 프레임은 수신한 워커의 Stream에만 있다. """
+
+    # 다른 워커가 수신한 프레임을 받아오는지 여부.
+    is_shared = False
+
+    async def publish(self, name: str, frame: Frame) -> None:
+        pass
+
+    def relay(self, stream, zones: ZoneSource) -> Optional[asyncio.Task]:
+
+        """
+        버스에서 받은 stream의 프레임을 stream에 게시하는 태스크를
+        시작한다. 전달할 프레임이 없는 백엔드는 None을 반환한다.
+
+        Args:
+            - stream: 프레임을 게시할 Stream.
+            - zones: 카메라 이름으로 존 마스크를 반환하는 함수.
+        """
+
+        return None
+
+
+def _deliver(stream, data: bytes, zones: ZoneSource) -> None:
+    origin, frame = decode(data, zones(stream.name))
+    if origin != ORIGIN:
+        # stream.publish()와 달리 last_active를 갱신하지 않으므로,
+        # 다른 워커에서 프레임이 와도 시청자가 없는 스트림은 정리된다.
+        stream.frames.publish(frame)
+
+
+class SharedMemoryBus(LocalBus):
+
+    """
+    같은 호스트의 워커들이 카메라마다 공유 메모리 링 하나를 공유하는
+    버스. 쓰는 쪽은 프레임을 수신한 워커 하나이며, 다른 워커들은
+    poll_interval마다 링의 시퀀스 번호를 확인한다. 한 카메라의
+    생산자는 한 번에 하나만 연결되어야 한다.
+
+    링은 처음 사용하는 워커가 만들며, 워커가 종료되어도 남아 있다가
+    재시작 후 다시 사용된다. (카메라마다 약 n_slots * slot_size 바이트)
+    링이 지워지고 다시 만들어져도 따라갈 수 있도록, reattach_after
+    동안 새 프레임이 없으면 읽는 쪽은 링에 다시 연결한다.
+
+    새 프레임이 idle_after 동안 없으면 확인 간격을 두 배씩 max_poll_
+    interval까지 늘리고, 프레임이 오면 poll_interval로 되돌린다. 링에
+    쓰는 워커는 다른 워커가 쓰기 시작하는지만 max_poll_interval마다
+    확인한다.
+
+    Args:
+        - n_slots: 링의 슬롯 수.
+        - slot_size: 메시지 하나의 최대 크기. 넘는 프레임은 버려진다.
+        - poll_interval: 읽는 쪽이 새 프레임을 확인하는 간격. (초)
+        - max_poll_interval: 프레임이 없을 때 확인 간격의 상한. (초)
+        - idle_after: 확인 간격을 늘리기 시작할 때까지의 시간. (초)
+        - reattach_after: 링에 다시 연결하기까지의 시간. (초)
+        - prefix: 세그먼트 이름 앞에 붙는 문자열. 같은 호스트에서
+                  여러 배포를 실행할 때 구분한다.
+    """
+
+    def __init__(
+            self,
+            n_slots: int = 4,
+            slot_size: int = 1 << 20,
+            poll_interval: float = 0.005,
+            reattach_after: float = 5.0,
+            prefix: str = 'vision',
+            max_poll_interval: float = 0.1,
+            idle_after: float = 1.0
+        ) -> None:
+
+        self.n_slots = n_slots
+        self.slot_size = slot_size
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max(poll_interval, max_poll_interval)
+        self.idle_after = idle_after
+        self.reattach_after = reattach_after
+        self.prefix = prefix
+        self.is_shared = True
+        self._rings: Dict[str, ByteRing] = {}
+        self._written: Dict[str, int] = {}
+
+    def _segment(self, name: str) -> str:
+        # 카메라 이름에는 세그먼트 이름에 쓸 수 없는 문자가 있을 수 있다.
+        digest = hashlib.sha1(name.encode('utf-8')).hexdigest()[:16]
+        return f'{self.prefix}_{digest}'
+
+    def _ring(self, name: str, create: bool) -> Optional[ByteRing]:
+        ring = self._rings.get(name)
+        if ring is None:
+            segment = self._segment(name)
+            try:
+                if create:
+                    ring = ByteRing.open(
+                        segment, self.n_slots, self.slot_size)
+                else:
+                    ring = ByteRing(segment)
+            except FileNotFoundError:
+                return None
+            self._rings[name] = ring
+        return ring
+
+    def _detach(self, name: str) -> None:
+        ring = self._rings.pop(name, None)
+        if ring is not None:
+            ring.close()
+
+    async def publish(self, name: str, frame: Frame) -> None:
+        data = encode(frame)
+        ring = self._ring(name, create=True)
+        if len(data) > ring.slot_size:
+            logging.warning(
+                f'{name}: dropped frame. {len(data)} bytes does not fit'
+                f' in a slot of {ring.slot_size} bytes.')
+            return
+        self._written[name] = ring.write(data)
+
+    def relay(self, stream, zones: ZoneSource) -> asyncio.Task:
+        return asyncio.create_task(self._relay(stream, zones))
+
+    async def _relay(self, stream, zones: ZoneSource) -> None:
+        loop = asyncio.get_running_loop()
+        seq = 0
+        received_at = loop.time()
+        interval = self.poll_interval
+        try:
+            while True:
+                ring = self._ring(stream.name, create=False)
+                if ring is None:
+                    # 아직 프레임을 수신한 워커가 없다.
+                    await asyncio.sleep(self.reattach_after / 10)
+                    continue
+                if ring.seq == self._written.get(stream.name):
+                    # 이 워커가 쓴 프레임은 이미 stream에 게시되었으므로
+                    # 복사하지 않는다.
+                    seq = ring.seq
+                    received_at = loop.time()
+                    interval = self.max_poll_interval
+                    message = None
+                else:
+                    message = ring.read(seq)
+                if message is not None:
+                    seq, data = message
+                    received_at = loop.time()
+                    interval = self.poll_interval
+                    try:
+                        _deliver(stream, data, zones)
+                    except ValueError as e:
+                        logging.warning(f'{stream.name}: dropped frame. {e}')
+                elif loop.time() - received_at > self.reattach_after:
+                    # 시퀀스 번호는 유지한다. 같은 링이면 마지막 프레임을
+                    # 다시 게시하지 않고, 새 링이면 번호가 달라 읽힌다.
+                    self._detach(stream.name)
+                    received_at = loop.time()
+                elif loop.time() - received_at > self.idle_after:
+                    interval = min(interval * 2, self.max_poll_interval)
+                await asyncio.sleep(interval)
+        finally:
+            # 정리된 스트림의 링 매핑을 닫는다. 다시 만들어지면 새 relay가
+            # 링에 다시 연결한다.
+            self._detach(stream.name)
+            self._written.pop(stream.name, None)
+
+
+class RedisBus(LocalBus):
+
+    """
+    Redis pub/sub 버스. 카메라마다 채널 하나를 사용하며, 워커들이
+    여러 호스트에 있어도 된다. 구독하지 않은 채널의 메시지는 Redis가
+    버리므로, 시청자가 없는 카메라의 프레임은 다른 워커로 전달되지
+    않는다.
+
+    연결이 끊기면 다시 구독한다. 재연결 간격은 min_backoff부터 실패할
+    때마다 두 배씩 max_backoff까지 늘어나며, 구독에 성공하면 처음으로
+    돌아간다.
+
+    Args:
+        - url: Redis URL. (redis://host:port/db)
+        - prefix: 채널 이름 앞에 붙는 문자열.
+        - client: redis.asyncio 클라이언트. 주어지면 url 대신 사용한다.
+        - min_backoff: 첫 재연결까지의 대기 시간. (초)
+        - max_backoff: 재연결 대기 시간의 상한. (초)
+    """
+
+    def __init__(
+            self,
+            url: str = 'redis://localhost:6379/0',
+            prefix: str = 'vision',
+            client=None,
+            min_backoff: float = 1.0,
+            max_backoff: float = 30.0
+        ) -> None:
+
+        if client is None:
+            if redis is None:
+                raise RuntimeError('redis is not installed.')
+            client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.is_shared = True
+        self._client = client
+
+    def _channel(self, name: str) -> str:
+        return f'{self.prefix}:frames:{name}'
+
+    async def publish(self, name: str, frame: Frame) -> None:
+        await self._client.publish(self._channel(name), encode(frame))
+
+    def relay(self, stream, zones: ZoneSource) -> asyncio.Task:
+        return asyncio.create_task(self._relay(stream, zones))
+
+    async def _relay(self, stream, zones: ZoneSource) -> None:
+        channel = self._channel(stream.name)
+        backoff = self.min_backoff
+        while True:
+            pubsub = self._client.pubsub()
+            try:
+                await pubsub.subscribe(channel)
+                backoff = self.min_backoff
+                async for message in pubsub.listen():
+                    if message['type'] != 'message':
+                        continue
+                    try:
+                        _deliver(stream, message['data'], zones)
+                    except ValueError as e:
+                        logging.warning(f'{stream.name}: dropped frame. {e}')
+            except Exception as e:
+                logging.warning(
+                    f'{stream.name}: lost the frame bus. {e!r}'
+                    f' reconnecting in {backoff:.1f}s.')
+            finally:
+                try:
+                    await pubsub.unsubscribe(channel)
+                    await pubsub.aclose()
+                except Exception:
+                    pass  # 연결이 이미 끊겼다.
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+
+BUSES = {'local': LocalBus, 'shm': SharedMemoryBus, 'redis': RedisBus}
+
+
+def make_bus(name: str = 'local', **options) -> LocalBus:
+
+    """
+    이름에 해당하는 버스를 만든다.
+
+    Args:
+        - name: 'local', 'shm', 'redis' 중 하나.
+        - options: 버스 클래스의 인자.
+    """
+
+    if name not in BUSES:
+        msg = (f'Expected bus is one of {tuple(BUSES)},'
+               f' but a different value was provided.:{name}')
+        raise ValueError(msg)
+    return BUSES[name](**options)
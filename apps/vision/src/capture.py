@@ -0,0 +1,153 @@
+"""
+서버 측 비디오 캡처. RTSP URL이나 동영상 파일에서 프레임을 읽는다.
+(tmp/streaming/src/video.VideoCaptureThread를 옮겨 온 것이다.)
+"""
+
+
+import logging
+import re
+import threading
+import time
+import traceback
+from typing import Callable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class OpenError(Exception):
+
+    def __init__(self):
+        super().__init__('failed to open the video source.')
+
+
+class GrabError(Exception):
+
+    def __init__(self):
+        super().__init__('failed to grab the next frame.')
+
+
+class RetrieveError(Exception):
+
+    def __init__(self):
+        super().__init__('failed to retrieve the next frame.')
+
+
+def redact(source: str) -> str:
+
+    """ 로그에 남기지 않도록 URL의 사용자 정보(user:password@)를 가린다. """
+
+    return re.sub(r'(?<=://)[^/@]*@', '***@', source)
+
+
+class CaptureThread(threading.Thread):
+
+    """
+    비디오 소스에서 프레임을 읽어 on_frame으로 넘기는 스레드. 프레임은
+    읽히는 대로 넘겨지므로, 밀린 프레임을 버리는 것은 on_frame의 몫이다.
+
+    fps가 주어지면 초당 fps개의 프레임만 넘긴다. 디코더가 밀리지 않도록
+    모든 프레임을 grab()하되, 넘기지 않을 프레임은 retrieve()(BGR 변환)와
+    리사이즈를 건너뛴다. 프레임은 미리 할당된 버퍼에 쓰이고 다음
+    프레임에서 덮어쓰이므로, on_frame 안에서 사용을 끝내거나 복사해야
+    한다.
+
+    소스를 열 수 없거나 GrabError/RetrieveError가 발생하면 스레드가
+    끝나지 않고 소스를 다시 연다. 재연결 간격은 min_backoff부터
+    실패할 때마다 두 배씩 max_backoff까지 늘어나며, 프레임을 하나라도
+    읽으면 처음으로 돌아간다. 동영상 파일은 끝나면 처음부터 다시
+    재생되며, 원본 fps에 맞춰 읽는다.
+
+    Args:
+        - source: RTSP URL 또는 동영상 파일 경로.
+        - on_frame: 프레임을 받을 함수. on_frame(frame, timestamp)는
+                    이 스레드에서 호출된다. timestamp는 프레임을 읽은
+                    시각이다. (unix time, 초)
+        - target_size: 출력 해상도. (width, height) None이면 원본 그대로.
+        - fps: 넘길 최대 프레임 수. None이면 모든 프레임을 넘긴다.
+        - min_backoff: 첫 재연결까지의 대기 시간. (초)
+        - max_backoff: 재연결 대기 시간의 상한. (초)
+    """
+
+    def __init__(
+            self,
+            source: str,
+            on_frame: Callable[[np.ndarray, float], None],
+            target_size: Optional[Tuple[int, int]] = None,
+            fps: Optional[float] = None,
+            min_backoff: float = 1.0,
+            max_backoff: float = 30.0
+        ) -> None:
+
+        super().__init__(name=f'vision-capture:{redact(source)}', daemon=True)
+        self.source = source
+        self._on_frame = on_frame
+        self._target_size = target_size
+        self._min_interval = 1 / fps if fps else 0.0
+        self._min_backoff = min_backoff
+        self._max_backoff = max_backoff
+        self._backoff = min_backoff
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self._capture()
+            except (OpenError, GrabError, RetrieveError) as e:
+                logging.warning(
+                    f'{redact(self.source)}: {e}'
+                    f' reconnecting in {self._backoff:.1f}s.')
+            except Exception:
+                traceback.print_exc()
+            if self._stopped.wait(self._backoff):
+                break
+            self._backoff = min(self._backoff * 2, self._max_backoff)
+
+    def _capture(self) -> None:
+        cap = cv2.VideoCapture(self.source)
+        try:
+            if not cap.isOpened():
+                raise OpenError
+            logging.info(f'{redact(self.source)}: connected.')
+
+            # 파일은 디코딩되는 대로 읽으면 원본보다 빨리 재생된다.
+            is_file = cap.get(cv2.CAP_PROP_FRAME_COUNT) > 0
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            interval = 1 / fps if is_file and fps > 0 else 0.0
+            next_at = deliver_at = time.monotonic()
+            frame = resized = None
+
+            while not self._stopped.is_set():
+                if not cap.grab():
+                    # 파일이 끝났으면 처음으로 되감는다.
+                    is_rewound = (is_file
+                                  and cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                                  and cap.grab())
+                    if not is_rewound:
+                        raise GrabError
+                self._backoff = self._min_backoff
+
+                now = time.monotonic()
+                if now >= deliver_at:
+                    deliver_at += self._min_interval
+                    if deliver_at < now:
+                        # 밀렸으면 따라잡지 않고 지금부터 다시 센다.
+                        deliver_at = now + self._min_interval
+                    # 버퍼는 첫 프레임에서 할당되고 이후 재사용된다.
+                    is_captured, frame = cap.retrieve(frame)
+                    if not is_captured:
+                        raise RetrieveError
+                    output = frame
+                    if self._target_size is not None:
+                        output = resized = cv2.resize(
+                            frame, self._target_size, dst=resized)
+                    self._on_frame(output, time.time())
+
+                if interval:
+                    next_at += interval
+                    self._stopped.wait(max(0.0, next_at - time.monotonic()))
+        finally:
+            cap.release()
+
+    def stop(self) -> None:
+        self._stopped.set()
@@ -0,0 +1,138 @@
+"""
+JPEG 코덱. libjpeg-turbo 바인딩(PyTurboJPEG)이 설치되어 있으면 이를
+사용하고, 없으면 OpenCV를 사용한다.
+
+    $ pip install PyTurboJPEG  # libturbojpeg 라이브러리도 필요하다.
+
+코덱 객체는 ctypes 핸들을 가지므로 pickle 할 수 없다. 렌더 풀의
+워커에는 이름만 넘기고, 워커 안에서 get_codec()으로 가져온다.
+"""
+
+
+from functools import lru_cache
+from typing import Optional, Union
+
+import cv2
+import numpy as np
+
+try:
+    from turbojpeg import TJPF_BGR, TJSAMP_420, TurboJPEG
+except ImportError:
+    TurboJPEG = None
+
+
+# OpenCV의 기본 JPEG 품질. 코덱이 바뀌어도 화질이 같도록 맞춘다.
+DEFAULT_QUALITY = 95
+REDUCTIONS = (1, 2, 4, 8)
+
+
+class OpenCVCodec():
+
+    """
+    cv2.imdecode/imencode 코덱. 축소 디코딩은 IMREAD_REDUCED_COLOR_*
+    를 사용한다.
+    """
+
+    name = 'opencv'
+
+    _FLAGS = {
+        1: cv2.IMREAD_COLOR,
+        2: cv2.IMREAD_REDUCED_COLOR_2,
+        4: cv2.IMREAD_REDUCED_COLOR_4,
+        8: cv2.IMREAD_REDUCED_COLOR_8}
+
+    def decode(
+            self,
+            jpeg: Union[bytes, np.ndarray],
+            reduce: int = 1
+        ) -> np.ndarray:
+
+        """
+        JPEG을 BGR 이미지로 디코딩한다.
+
+        Args:
+            - jpeg: JPEG 데이터.
+            - reduce: 축소 비율. REDUCTIONS 중 하나.
+        """
+
+        if not isinstance(jpeg, np.ndarray):
+            jpeg = np.frombuffer(jpeg, dtype=np.uint8)
+        img = cv2.imdecode(jpeg, self._FLAGS[reduce])
+        if img is None:
+            raise RuntimeError('jpeg decode error.')
+        return img
+
+    def encode(self, img: np.ndarray, quality: Optional[int] = None) -> bytes:
+        quality = DEFAULT_QUALITY if quality is None else quality
+        is_encoded, jpeg = cv2.imencode(
+            '.jpeg', img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not is_encoded:
+            raise RuntimeError('jpeg encode error.')
+        return jpeg.tobytes()
+
+
+class TurboJPEGCodec():
+
+    """
+    libjpeg-turbo 코덱. 라이브러리는 한 번만 로드하여 재사용하며, 축소
+    디코딩은 DCT 단계에서 수행되므로 전체 해상도로 디코딩하지 않는다.
+    크로마 서브샘플링은 OpenCV와 같은 4:2:0이다.
+    """
+
+    name = 'turbojpeg'
+
+    def __init__(self) -> None:
+        if TurboJPEG is None:
+            raise RuntimeError('PyTurboJPEG is not installed.')
+        self._jpeg = TurboJPEG()
+
+    def decode(
+            self,
+            jpeg: Union[bytes, np.ndarray],
+            reduce: int = 1
+        ) -> np.ndarray:
+
+        scaling_factor = None if reduce == 1 else (1, reduce)
+        return self._jpeg.decode(
+            jpeg, pixel_format=TJPF_BGR, scaling_factor=scaling_factor)
+
+    def encode(self, img: np.ndarray, quality: Optional[int] = None) -> bytes:
+        quality = DEFAULT_QUALITY if quality is None else quality
+        return self._jpeg.encode(
+            np.ascontiguousarray(img), quality=quality,
+            pixel_format=TJPF_BGR, jpeg_subsample=TJSAMP_420)
+
+
+def reduction(scale: float) -> int:
+
+    """ scale 배로 줄일 이미지를 디코딩할 때 쓸 수 있는 최대 축소 비율. """
+
+    return max(r for r in REDUCTIONS if r * scale <= 1)
+
+
+CODECS = {codec.name: codec for codec in (TurboJPEGCodec, OpenCVCodec)}
+
+
+@lru_cache(maxsize=None)
+def get_codec(name: str = 'auto'):
+
+    """
+    이름에 해당하는 코덱을 반환한다. 코덱은 프로세스마다 한 번만
+    만들어진다.
+
+    Args:
+        - name: 'auto', 'turbojpeg', 'opencv' 중 하나. 'auto'는
+                turbojpeg를 사용할 수 있으면 turbojpeg, 아니면 opencv.
+    """
+
+    if name == 'auto':
+        try:
+            return TurboJPEGCodec()
+        except (RuntimeError, OSError):
+            return OpenCVCodec()
+
+    if name not in CODECS:
+        msg = (f"Expected codec is one of {('auto', *CODECS)},"
+               f' but a different value was provided.:{name}')
+        raise ValueError(msg)
+    return CODECS[name]()
@@ -0,0 +1,177 @@
+"""
+프레임 수신 프로토콜(envelope).
+
+하나의 웹소켓 바이너리 메시지는 다음과 같이 구성된다. 모든 값은
+little-endian 이며, 배열은 float32 로 패킹된다.
+
+    ┌──────────────────────────────┐
+    │ header (40 bytes)            │ HEADER 참고
+    ├──────────────────────────────┤
+    │ camera_id (utf-8)            │ 4 bytes 경계로 패딩
+    ├──────────────────────────────┤
+    │ boxes (n, 7) float32         │ (x1, y1, x2, y2, id, conf, cls)
+    ├──────────────────────────────┤
+    │ kptss (n, k, 3) float32      │ (x, y, conf)
+    ├──────────────────────────────┤
+    │ image (image_len bytes)      │ 인코딩된 이미지 (JPEG)
+    └──────────────────────────────┘
+
+모든 구간의 위치가 헤더만으로 결정되므로 파싱은 O(1)이며, 배열과
+이미지는 np.frombuffer 뷰로 노출되어 복사가 일어나지 않는다.
+"""
+
+
+import struct
+from dataclasses import dataclass
+from typing import Any, Union
+
+import numpy as np
+
+
+MAGIC = b'VSNF'
+VERSION = 1
+
+CODEC_JPEG = 1
+CODECS = (CODEC_JPEG,)
+
+# magic, version, codec, camera_id_len, width, height,
+# timestamp, seq, n_boxes, n_kpts, reserved, image_len
+HEADER = struct.Struct('<4sBBHHHdQIHHI')
+
+BOX_DIM = 7
+KPT_DIM = 3
+
+
+class EnvelopeError(ValueError):
+    pass
+
+
+@dataclass
+class Frame():
+
+    """
+    파싱된 프레임. image, boxes, kptss 는 data 위의 읽기 전용 뷰이다.
+
+    Args:
+        - camera_id: 프레임을 보낸 카메라 id.
+        - timestamp: 생산자가 프레임을 캡처한 시각. (unix time, 초)
+        - seq: 생산자가 매긴 프레임 시퀀스 번호.
+        - codec: 이미지 코덱. (CODEC_JPEG)
+        - width, height: 이미지 해상도.
+        - image: 인코딩된 이미지. (uint8, 1차원)
+        - boxes: 바운딩 박스 배열. (n, 7)
+        - kptss: 키포인트 배열. (n, k, 3)
+        - data: 수신된 원본 메시지.
+        - occupancy: 수신 측에서 채우는 존별 체류 정보.
+                     (timer.Occupancy)
+    """
+
+    camera_id: str
+    timestamp: float
+    seq: int
+    codec: int
+    width: int
+    height: int
+    image: np.ndarray
+    boxes: np.ndarray
+    kptss: np.ndarray
+    data: bytes
+    occupancy: Any = None
+
+
+def _padded(size: int) -> int:
+    return (size + 3) & ~3
+
+
+def pack(
+        image: Union[bytes, np.ndarray],
+        boxes: np.ndarray,
+        kptss: np.ndarray,
+        camera_id: str,
+        timestamp: float,
+        seq: int,
+        width: int,
+        height: int,
+        codec: int = CODEC_JPEG
+    ) -> bytes:
+
+    """
+    프레임을 envelope 메시지로 패킹한다. 생산자 측에서 사용한다.
+
+    Args:
+        - image: 인코딩된 이미지.
+        - boxes: 바운딩 박스 배열. (n, 7)
+        - kptss: 키포인트 배열. (n, k, 3) 키포인트가 없다면 (n, 0, 3).
+        - 나머지 인자는 Frame 참고.
+    """
+
+    boxes = np.ascontiguousarray(boxes, dtype='<f4').reshape(-1, BOX_DIM)
+    kptss = np.ascontiguousarray(kptss, dtype='<f4')
+    if kptss.size == 0:
+        kptss = kptss.reshape(len(boxes), 0, KPT_DIM)
+    else:
+        kptss = kptss.reshape(len(boxes), -1, KPT_DIM)
+    camera_id = camera_id.encode('utf-8')
+    image = memoryview(image).cast('B')
+
+    header = HEADER.pack(
+        MAGIC, VERSION, codec, len(camera_id), width, height,
+        timestamp, seq, len(boxes), kptss.shape[1], 0, len(image))
+    padding = b'\x00' * (_padded(len(camera_id)) - len(camera_id))
+    return b''.join([
+        header, camera_id, padding, boxes.data, kptss.data, image])
+
+
+def unpack(data: bytes) -> Frame:
+
+    """
+    envelope 메시지를 파싱한다. 형식이 맞지 않으면 EnvelopeError를
+    발생시킨다.
+    """
+
+    if len(data) < HEADER.size:
+        msg = f'Envelope is shorter than the header.:{len(data)}'
+        raise EnvelopeError(msg)
+
+    (magic, version, codec, id_len, width, height, timestamp, seq,
+     n_boxes, n_kpts, _, image_len) = HEADER.unpack_from(data)
+
+    if magic != MAGIC:
+        msg = f'Expected magic is {MAGIC!r}, but {magic!r} was provided.'
+        raise EnvelopeError(msg)
+
+    if version != VERSION:
+        msg = f'Unsupported envelope version.:{version}'
+        raise EnvelopeError(msg)
+
+    if codec not in CODECS:
+        msg = (f'Expected codec is one of {CODECS},'
+               f' but a different value was provided.:{codec}')
+        raise EnvelopeError(msg)
+
+    boxes_offset = HEADER.size + _padded(id_len)
+    kptss_offset = boxes_offset + n_boxes * BOX_DIM * 4
+    image_offset = kptss_offset + n_boxes * n_kpts * KPT_DIM * 4
+    if image_offset + image_len != len(data):
+        msg = ('Envelope size does not match the header.'
+               f':{len(data)} != {image_offset + image_len}')
+        raise EnvelopeError(msg)
+
+    try:
+        camera_id = bytes(
+            data[HEADER.size:HEADER.size + id_len]).decode('utf-8')
+    except UnicodeDecodeError as e:
+        msg = f'camera_id is not valid UTF-8.:{e}'
+        raise EnvelopeError(msg) from None
+    boxes = np.frombuffer(
+        data, dtype='<f4', count=n_boxes * BOX_DIM, offset=boxes_offset
+    ).reshape(n_boxes, BOX_DIM)
+    kptss = np.frombuffer(
+        data, dtype='<f4', count=n_boxes * n_kpts * KPT_DIM,
+        offset=kptss_offset
+    ).reshape(n_boxes, n_kpts, KPT_DIM)
+    image = np.frombuffer(
+        data, dtype=np.uint8, count=image_len, offset=image_offset)
+
+    return Frame(camera_id, timestamp, seq, codec, width, height,
+                 image, boxes, kptss, data)
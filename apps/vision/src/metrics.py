@@ -0,0 +1,192 @@
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+
+
+# 단계별 소요 시간 히스토그램의 버킷 상한. (초)
+BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+STAGES = ('ingest', 'decode', 'plot', 'encode', 'send')
+# 지연 시간을 재는 지점. 캡처부터 수신까지, 캡처부터 전송까지.
+LATENCY_POINTS = ('ingest', 'send')
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram():
+
+    """
+    버킷이 미리 할당된 히스토그램. observe()는 이분 탐색 한 번과
+    정수 덧셈만 수행하며, 누적 분포는 조회할 때 계산한다.
+
+    Args:
+        - bounds: 오름차순 버킷 상한 배열. 마지막 버킷(+Inf)은 자동으로
+                  추가된다.
+    """
+
+    __slots__ = ('bounds', 'counts', 'sum')
+
+    def __init__(self, bounds: Sequence[float] = BUCKETS) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def cumulative(self) -> List[int]:
+        return list(accumulate(self.counts))
+
+
+class LatencyWindow():
+
+    """
+    최근 size개의 지연 시간을 보관하는 링 버퍼. record()는 배열에 값
+    하나를 쓰기만 하며, 분위수는 조회할 때 계산한다.
+
+    Args:
+        - size: 보관할 최근 값의 수.
+    """
+
+    def __init__(self, size: int = 1024) -> None:
+        self._values = np.zeros(size, dtype=np.float64)
+        self._index = 0
+        self.count = 0
+        self.sum = 0.0
+
+    def record(self, seconds: float) -> None:
+        self._values[self._index] = seconds
+        self._index = (self._index + 1) % len(self._values)
+        self.count += 1
+        self.sum += seconds
+
+    def quantiles(self, qs: Sequence[float] = QUANTILES) -> List[float]:
+        if not self.count:
+            return [float('nan')] * len(qs)
+        values = self._values[:min(self.count, len(self._values))]
+        return np.quantile(values, qs).tolist()
+
+
+class StreamMetrics():
+
+    """
+    스트림 하나의 파이프라인 지표. 모든 기록은 이벤트 루프 스레드
+    에서만 일어나므로 락 없이 갱신된다. 렌더 풀에서 측정된 시간도
+    결과와 함께 루프로 돌아온 뒤에 기록된다.
+
+    - frames_received: 수신된 프레임 수.
+    - frames_rejected: envelope가 잘못되어 버려진 프레임 수.
+    - bus_errors: 프레임 버스에 게시하지 못한 프레임 수.
+    - frames_skipped: 단계별로 건너뛴 프레임 수. render는 렌더링이
+                      밀려 덮어쓰인 프레임, send는 시청자 전송이 밀려
+                      건너뛴 청크다.
+    - bytes_sent: 시청자에게 보낸 바이트 수.
+    - stages: 단계별 소요 시간 히스토그램.
+    - latency: 지점별 최근 지연 시간. 생산자가 envelope에 기록한 캡처
+               시각부터 잰다. 생산자와 서버의 시계가 동기화되어
+               있어야 한다.
+    """
+
+    def __init__(self) -> None:
+        self.frames_received = 0
+        self.frames_rejected = 0
+        self.bus_errors = 0
+        self.frames_skipped = {'render': 0, 'send': 0}
+        self.bytes_sent = 0
+        self.stages: Dict[str, Histogram] = {
+            stage: Histogram() for stage in STAGES}
+        self.latency: Dict[str, LatencyWindow] = {
+            point: LatencyWindow() for point in LATENCY_POINTS}
+
+    def observe(self, stage: str, seconds: float) -> None:
+        self.stages[stage].observe(seconds)
+
+
+def exposition(streams: Iterable) -> str:
+
+    """
+    스트림들의 지표를 Prometheus 텍스트 형식으로 변환한다.
+
+    Args:
+        - streams: metrics, name, viewers 속성을 가진 스트림들.
+    """
+
+    lines = []
+
+    def family(metric, kind, help, samples):
+        lines.append(f'# HELP {metric} {help}')
+        lines.append(f'# TYPE {metric} {kind}')
+        lines.extend(f'{metric}{labels} {value}' for labels, value in samples)
+
+    # 레이블 값에 쓸 수 없는 문자를 이스케이프한다.
+    streams = [
+        (s.name.replace('\\', '\\\\').replace('"', '\\"')
+         .replace('\n', '\\n'), s)
+        for s in streams]
+
+    family(
+        'vision_frames_received_total', 'counter',
+        'Frames received from the producer.',
+        [(f'{{stream="{name}"}}', s.metrics.frames_received)
+         for name, s in streams])
+    family(
+        'vision_frames_rejected_total', 'counter',
+        'Frames dropped because of a malformed envelope.',
+        [(f'{{stream="{name}"}}', s.metrics.frames_rejected)
+         for name, s in streams])
+    family(
+        'vision_bus_errors_total', 'counter',
+        'Frames that could not be published to the frame bus.',
+        [(f'{{stream="{name}"}}', s.metrics.bus_errors)
+         for name, s in streams])
+    family(
+        'vision_frames_skipped_total', 'counter',
+        'Frames overwritten before they were rendered or sent.',
+        [(f'{{stream="{name}",stage="{stage}"}}', n)
+         for name, s in streams
+         for stage, n in s.metrics.frames_skipped.items()])
+    family(
+        'vision_bytes_sent_total', 'counter',
+        'Bytes sent to MJPEG viewers.',
+        [(f'{{stream="{name}"}}', s.metrics.bytes_sent)
+         for name, s in streams])
+    family(
+        'vision_viewers', 'gauge',
+        'MJPEG viewers currently subscribed.',
+        [(f'{{stream="{name}"}}', s.viewers) for name, s in streams])
+
+    samples = []
+    for name, s in streams:
+        for stage, hist in s.metrics.stages.items():
+            labels = f'stream="{name}",stage="{stage}"'
+            cumulative = hist.cumulative()
+            for bound, n in zip(hist.bounds, cumulative):
+                samples.append((f'_bucket{{{labels},le="{bound}"}}', n))
+            samples.append((f'_bucket{{{labels},le="+Inf"}}', cumulative[-1]))
+            samples.append((f'_sum{{{labels}}}', hist.sum))
+            samples.append((f'_count{{{labels}}}', cumulative[-1]))
+    family(
+        'vision_stage_seconds', 'histogram',
+        'Seconds spent per frame in each pipeline stage.', samples)
+
+    samples = []
+    for name, s in streams:
+        for point, window in s.metrics.latency.items():
+            labels = f'stream="{name}",point="{point}"'
+            for q, value in zip(QUANTILES, window.quantiles()):
+                samples.append((f'{{{labels},quantile="{q}"}}', value))
+            samples.append((f'_sum{{{labels}}}', window.sum))
+            samples.append((f'_count{{{labels}}}', window.count))
+    family(
+        'vision_latency_seconds', 'summary',
+        'Seconds from capture to ingest or send, over recent frames.',
+        samples)
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,228 @@
+import asyncio
+import math
+import time
+import traceback
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .codec import get_codec, reduction
+from .render import (
+    Canvas, Chunk, MODES, Overlay, RenderPool, annotate, plot, to_multipart)
+from .stream import Broadcast, Stream
+
+
+class Mosaic():
+
+    """
+    여러 스트림의 프레임을 타일로 배치하는 격자 버퍼. 버퍼는 한 번만
+    할당되며, 프레임이 바뀐 타일만 다시 채운다. 타일은 비율을 유지한
+    채 타일 가운데에 놓인다.
+
+    Args:
+        - n_tiles: 타일 수.
+        - cols: 열 수.
+        - tile_size: 타일 하나의 (width, height).
+    """
+
+    def __init__(
+            self,
+            n_tiles: int,
+            cols: int,
+            tile_size: Tuple[int, int]
+        ) -> None:
+
+        self.cols = cols
+        self.tile_size = tile_size
+        rows = math.ceil(n_tiles / cols)
+        width, height = tile_size
+        self.buffer = np.zeros((rows * height, cols * width, 3), np.uint8)
+        self._shapes: List[Optional[Tuple[int, ...]]] = [None] * n_tiles
+
+    def tile(self, index: int) -> np.ndarray:
+        width, height = self.tile_size
+        row, col = divmod(index, self.cols)
+        return self.buffer[row * height:(row + 1) * height,
+                           col * width:(col + 1) * width]
+
+    def paste(self, index: int, img: np.ndarray) -> None:
+        tile = self.tile(index)
+        if img.shape != self._shapes[index]:
+            tile[:] = 0
+            self._shapes[index] = img.shape
+        height, width = img.shape[:2]
+        y = (tile.shape[0] - height) // 2
+        x = (tile.shape[1] - width) // 2
+        np.copyto(tile[y:y + height, x:x + width], img)
+
+
+def fit(size: Tuple[int, int], tile_size: Tuple[int, int]) -> float:
+
+    """ (width, height) 크기의 이미지를 타일 안에 넣기 위한 배율. """
+
+    return min(tile_size[0] / size[0], tile_size[1] / size[1])
+
+
+def render_tile(
+        jpeg: np.ndarray,
+        overlay: Overlay,
+        mode: str,
+        size: Tuple[int, int],
+        tile_size: Tuple[int, int],
+        codec: str = 'auto'
+    ) -> Tuple[np.ndarray, Tuple[float, float]]:
+
+    """
+    JPEG을 디코딩하여 overlay를 그리고 타일 크기에 맞게 줄인 이미지를,
+    디코딩/플로팅(축소 포함) 각 단계의 소요 시간(초)과 함께 반환한다.
+    렌더 풀의 워커에서 실행된다. raw 모드는 처음부터 줄여서 디코딩한다.
+
+    Args:
+        - size: 스트림 해상도. (width, height)
+    """
+
+    codec = get_codec(codec)
+    reduce = reduction(fit(size, tile_size)) if mode == 'raw' else 1
+
+    t0 = time.perf_counter()
+    frame = codec.decode(jpeg, reduce)
+    t1 = time.perf_counter()
+
+    frame = plot(frame, overlay, mode)
+    height, width = frame.shape[:2]
+    scale = fit((width, height), tile_size)
+    if scale < 1:
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    t2 = time.perf_counter()
+    return frame, (t1 - t0, t2 - t1)
+
+
+def encode_chunk(
+        img: np.ndarray,
+        canvas: Canvas,
+        timestamp: Optional[float] = None,
+        quality: Optional[int] = None,
+        scale: float = 1.0,
+        codec: str = 'auto'
+    ) -> Tuple[bytes, float]:
+
+    """
+    이미지를 인코딩한 multipart 청크와 소요 시간(초)을 반환한다. 렌더
+    풀의 워커에서 실행된다. 인자는 render_chunk 참고.
+    """
+
+    t0 = time.perf_counter()
+    img = canvas.scale(img, scale)
+    chunk = to_multipart(get_codec(codec).encode(img, quality), timestamp)
+    return chunk, time.perf_counter() - t0
+
+
+async def wait_any(sources: Sequence[Stream], seqs: Sequence[int]) -> None:
+
+    """ 스트림 중 하나라도 seqs보다 새로운 프레임을 받을 때까지 기다린다. """
+
+    if any(s.frames.seq != seq for s, seq in zip(sources, seqs)):
+        return
+    waiters = [asyncio.ensure_future(s.frames.wait(seq))
+               for s, seq in zip(sources, seqs)]
+    try:
+        await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for waiter in waiters:
+            waiter.cancel()
+
+
+async def render_mosaic(
+        stream: Stream,
+        output: Broadcast,
+        sources: Sequence[Stream],
+        mode: str = 'raw',
+        cols: Optional[int] = None,
+        tile_size: Tuple[int, int] = (640, 360),
+        fps: float = 10.0,
+        pool: Optional[RenderPool] = None,
+        timestamps: bool = False,
+        quality: Optional[int] = None,
+        scale: float = 1.0,
+        codec: str = 'auto'
+    ) -> None:
+
+    """
+    모자이크의 렌더 태스크. 소스 스트림 중 하나에 새 프레임이 오면 바뀐
+    타일만 다시 그려 격자 전체를 한 번 인코딩하고, Chunk로 출력 슬롯에
+    게시한다. 소스들의 프레임이 제각각 도착하므로, 인코딩은 초당 fps번
+    으로 제한한다. 렌더 태스크가 살아 있는 동안 소스 스트림은 정리되지
+    않는다.
+
+    Args:
+        - stream: 모자이크 스트림. 지표와 렌더 풀의 동시 실행 제한에
+                  사용된다.
+        - sources: 타일로 배치할 스트림들.
+        - mode: 타일의 렌더 모드. MODES 중 하나.
+        - cols: 열 수. None이면 정사각형에 가깝게 정한다.
+        - tile_size: 타일 하나의 (width, height).
+        - fps: 최대 인코딩 횟수. 0이면 제한하지 않는다.
+        - 나머지: render_stream 참고.
+    """
+
+    if mode not in MODES:
+        msg = f'Expected mode is one of {MODES}, but {mode!r} was provided.'
+        raise ValueError(msg)
+
+    async def run(fn, *args):
+        if pool is None:
+            return fn(*args)
+        return await pool.run(stream, fn, *args)
+
+    metrics = stream.metrics
+    cols = cols or math.ceil(math.sqrt(len(sources)))
+    mosaic = Mosaic(len(sources), cols, tile_size)
+    canvas = Canvas()
+    min_interval = 1 / fps if fps else 0.0
+    seqs = [0] * len(sources)
+    seq = 0
+
+    for source in sources:
+        source.attach()
+    try:
+        while True:
+            await wait_any(sources, seqs)
+            started_at = time.perf_counter()
+            captured_at = None
+            for i, source in enumerate(sources):
+                if source.frames.seq == seqs[i]:
+                    continue
+                seqs[i], frame = source.frames.seq, source.frames.value
+                try:
+                    tile, (decode, draw) = await run(
+                        render_tile, frame.image, annotate(frame), mode,
+                        (frame.width, frame.height), tile_size, codec)
+                except Exception:
+                    traceback.print_exc()
+                    continue
+                mosaic.paste(i, tile)
+                metrics.observe('decode', decode)
+                metrics.observe('plot', draw)
+                captured_at = max(captured_at or 0.0, frame.timestamp)
+
+            if captured_at is not None:
+                timestamp = captured_at if timestamps else None
+                try:
+                    chunk, encode = await run(
+                        encode_chunk, mosaic.buffer, canvas, timestamp,
+                        quality, scale, codec)
+                except Exception:
+                    traceback.print_exc()
+                else:
+                    seq += 1
+                    output.publish(Chunk(chunk, captured_at, seq))
+                    metrics.observe('encode', encode)
+
+            delay = started_at + min_interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+    finally:
+        for source in sources:
+            source.detach()
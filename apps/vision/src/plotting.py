@@ -1,9 +1,146 @@
-from typing import Iterable, Tuple, Dict, List
+import threading
+from collections import OrderedDict
+from typing import Iterable, Tuple, Dict, List, Sequence
 
 import cv2
 import numpy as np
 
 
+class Label():
+
+    """
+    미리 렌더링된 라벨 비트맵.
+
+    Args:
+        - bitmap: 라벨 비트맵. 안티앨리어싱된 글자 가장자리는 alpha 값이
+                  곱해진 상태(premultiplied)로 저장된다. (h, w, 3)
+        - inv_alpha: 255 - alpha. 배경 사각형처럼 불투명한 픽셀은 0,
+                     그려지지 않은 픽셀은 255. (h, w, 3)
+        - offset: org에 대한 비트맵 좌상단의 상대 좌표. (dx, dy)
+    """
+
+    def __init__(
+            self,
+            bitmap: np.ndarray,
+            inv_alpha: np.ndarray,
+            offset: Tuple[int, int]
+        ) -> None:
+
+        self.bitmap = bitmap
+        self.inv_alpha = inv_alpha
+        self.offset = offset
+
+    @classmethod
+    def render(cls, txt, style, scale, thick, color, bgcolor) -> 'Label':
+        (txt_width, txt_height), baseline = cv2.getTextSize(txt,
+                                                            style,
+                                                            scale,
+                                                            thick)
+        # 글자 획의 두께와 baseline 아래로 내려가는 글자를 위한 여백.
+        margin = thick + 1
+        height = margin + txt_height + baseline + margin
+        width = margin + txt_width + margin
+        org = (margin, margin + txt_height)
+
+        # 검은 배경 위에 그리면 안티앨리어싱된 가장자리는 color * alpha
+        # 가 되므로, bitmap은 그대로 premultiplied 비트맵이 된다.
+        bitmap = np.zeros(shape=(height, width, 3), dtype=np.uint8)
+        alpha = np.zeros(shape=(height, width, 3), dtype=np.uint8)
+        if bgcolor is not None:
+            x, y = org
+            pt1 = (x, y - txt_height)
+            pt2 = (x + txt_width, y)
+            cv2.rectangle(bitmap, pt1, pt2, bgcolor, cv2.FILLED)
+            cv2.rectangle(alpha, pt1, pt2, (255, 255, 255), cv2.FILLED)
+        cv2.putText(bitmap, txt, org, style, scale, color, thick)
+        cv2.putText(alpha, txt, org, style, scale, (255, 255, 255), thick)
+
+        return cls(bitmap, 255 - alpha, (-org[0], -org[1]))
+
+    def blit(self, img: np.ndarray, org: Tuple[int, int]) -> None:
+
+        """
+        라벨을 이미지에 복사한다. 이미지 경계 밖으로 나가는 부분은
+        잘라낸다.
+
+            img = bitmap + img * (255 - alpha) / 255
+        """
+
+        height, width = self.bitmap.shape[:2]
+        img_height, img_width = img.shape[:2]
+        x1, y1 = org[0] + self.offset[0], org[1] + self.offset[1]
+        bx1, by1 = max(0, -x1), max(0, -y1)
+        bx2 = width - max(0, x1 + width - img_width)
+        by2 = height - max(0, y1 + height - img_height)
+        if bx1 >= bx2 or by1 >= by2:
+            return
+
+        roi = img[y1 + by1:y1 + by2, x1 + bx1:x1 + bx2]
+        cv2.multiply(roi,
+                     self.inv_alpha[by1:by2, bx1:bx2],
+                     dst=roi,
+                     scale=1 / 255)
+        cv2.add(roi, self.bitmap[by1:by2, bx1:bx2], dst=roi)
+
+
+class LabelCache():
+
+    """
+    미리 렌더링된 텍스트 비트맵의 LRU 캐시. 프레임마다 반복되는 라벨
+    (예: 'Person 0.873 00:01:12')을 매번 cv2.getTextSize, cv2.putText
+    로 다시 그리지 않고, 캐시된 비트맵을 이미지에 복사한다.
+
+    Args:
+        - maxsize: 캐시에 보관할 최대 비트맵 수.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self._maxsize = maxsize
+        self._labels = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._labels.clear()
+
+    def get(
+            self,
+            txt: str,
+            style: int,
+            scale: float,
+            thick: int,
+            color: Tuple[int, int, int],
+            bgcolor: Tuple[int, int, int] = None
+        ) -> Label:
+
+        """
+        라벨 비트맵을 반환한다. 캐시에 없으면 새로 렌더링한다.
+
+        Returns:
+            - label: 라벨 비트맵. Label 참고.
+        """
+
+        key = (txt, style, scale, thick, color, bgcolor)
+        with self._lock:
+            label = self._labels.get(key)
+            if label is not None:
+                self._labels.move_to_end(key)
+                return label
+
+        label = Label.render(*key)
+        with self._lock:
+            self._labels[key] = label
+            if len(self._labels) > self._maxsize:
+                self._labels.popitem(last=False)
+        return label
+
+
+LABEL_CACHE = LabelCache()
+
+
 def plot_text(
         img: np.ndarray,
         txt: str,
@@ -33,27 +170,14 @@ def plot_text(
         - style: 텍스트 스타일.
         - thick: 텍스트 두께.
         - bgcolor: 텍스트 백그라운드 색상. RGB(or BGR)888.        
-    """
 
-    (txt_width, txt_height), _ = cv2.getTextSize(txt,
-                                                 style,
-                                                 scale,
-                                                 thick)
-
-    if bgcolor is not None:
-        x, y = org
-        pt1 = (x, y - txt_height) 
-        pt2 = (x + txt_width, y)
-        cv2.rectangle(img, pt1, pt2, bgcolor, cv2.FILLED)
+    텍스트는 LABEL_CACHE에 캐시된 비트맵을 복사하여 표시된다.
+    """
 
-    cv2.putText(
-        img,
-        txt,
-        org,
-        style,
-        scale,
-        color,
-        thick)
+    label = LABEL_CACHE.get(
+        txt, style, scale, thick, tuple(color),
+        None if bgcolor is None else tuple(bgcolor))
+    label.blit(img, org)
 
 
 def plot_bounding_box(
@@ -202,3 +326,133 @@ def plot_keypoints(
                      pt2,
                      color,
                      limb_thick)
+
+
+def schema_to_limbs(schema: Dict[int, List[int]]) -> np.ndarray:
+
+    """
+    키포인트 스키마를 연결선(limb) 배열로 변환한다. 스키마는 프레임
+    마다 순회하지 않도록, 한 번만 변환하여 재사용한다.
+
+    Args:
+        - schema: plot_keypoints()의 schema 참고.
+
+    Returns:
+        - 연결선의 시작점, 끝점 키포인트 index 배열. (E, 2)
+    """
+
+    limbs = [(i, j) for i, js in schema.items() for j in js]
+    return np.array(limbs, dtype=np.intp).reshape(-1, 2)
+
+
+def plot_bounding_boxes(
+        img: np.ndarray,
+        xyxys: np.ndarray,
+        color_ids: np.ndarray,
+        palette: Sequence[Tuple[int, int, int]],
+        border_thick: int = 1,
+        labels: Sequence[str] = None
+    ) -> None:
+
+    """
+    입력 이미지에 여러 바운딩 박스를 한 번에 표시한다. 같은 색상의
+    박스들은 cv2.polylines 한 번으로 그려진다.
+
+    Args:
+        - img: 바운딩 박스가 표시될 입력 이미지.
+        - xyxys: 바운딩 박스 좌상단, 우하단 좌표 배열. (N, 4)
+        - color_ids: 각 바운딩 박스의 색상 index. (N,)
+        - palette: 색상 배열. RGB(or BGR)888.
+        - border_thick: 바운딩 박스의 경계선 두께.
+        - labels: 각 바운딩 박스 상단에 표시될 텍스트. 만약 이 값이
+                  None 이라면 텍스트를 표시하지 않는다.
+    """
+
+    xyxys = np.asarray(xyxys)
+    if xyxys.ndim != 2 or xyxys.shape[-1] != 4:
+        msg = ('Expected shape of the xyxys is (N, 4),'
+               ' but a different value was provided.'
+               f':{xyxys.shape}')
+        raise ValueError(msg)
+
+    xyxys = xyxys.astype(np.int32)
+    x1, y1, x2, y2 = xyxys.T
+    rects = np.stack([x1, y1, x2, y1, x2, y2, x1, y2], axis=1)
+    rects = rects.reshape(-1, 4, 2)
+    color_ids = np.asarray(color_ids)
+
+    for color_id in np.unique(color_ids):
+        cv2.polylines(img,
+                      rects[color_ids == color_id],
+                      True,
+                      palette[color_id],
+                      border_thick)
+
+    if labels is not None:
+        for xyxy, color_id, label in zip(xyxys, color_ids, labels):
+            plot_text(img,
+                      label,
+                      (int(xyxy[0]), int(xyxy[1])),
+                      bgcolor=palette[color_id])
+
+
+def plot_skeletons(
+        img: np.ndarray,
+        kptss: np.ndarray,
+        color_ids: np.ndarray,
+        palette: Sequence[Tuple[int, int, int]],
+        limbs: np.ndarray,
+        conf_thres: float = 0.5,
+        limb_thick: int = 1
+    ) -> None:
+
+    """
+    입력 이미지에 여러 사람의 키포인트들을 한 번에 표시한다. 연결선은
+    confidence 점수로 한꺼번에 걸러지며, 같은 색상의 연결선들은
+    cv2.polylines 한 번으로 그려진다. 사람별로 그리는 plot_keypoints
+    반복과 달리 색상 순서로 그려지므로, 사람들이 겹치는 곳에서는 위에
+    그려지는 연결선이 다를 수 있다.
+
+    스키마의 키포인트 수와 kptss의 K가 다르면, K 범위 안의 키포인트만
+    잇는 연결선만 그린다.
+
+    Args:
+        - img: 키포인트들이 표시될 입력 이미지.
+        - kptss: 키포인트 배열. (N, K, 3)
+        - color_ids: 각 사람의 색상 index. (N,)
+        - palette: 색상 배열. RGB(or BGR)888.
+        - limbs: schema_to_limbs()가 반환한 연결선 배열. (E, 2)
+        - conf_thres: confidence 점수 하한선.
+        - limb_thick: 연결선의 두께.
+    """
+
+    kptss = np.asarray(kptss)
+    if kptss.ndim != 3 or kptss.shape[-1] != 3:
+        msg = ('Expected shape of the kptss is (N, K, 3),'
+               ' but a different value was provided.'
+               f':{kptss.shape}')
+        raise ValueError(msg)
+
+    if kptss.shape[1] == 0:
+        return
+
+    limbs = limbs[(limbs < kptss.shape[1]).all(axis=1)]
+    if not len(limbs):
+        return
+
+    pts = kptss[:, :, :2].astype(np.int32)
+    is_valid = kptss[:, :, 2] >= conf_thres
+    starts, ends = limbs[:, 0], limbs[:, 1]
+    is_drawn = is_valid[:, starts] & is_valid[:, ends]            # (N, E)
+    segments = np.stack([pts[:, starts], pts[:, ends]], axis=2)  # (N, E, 2, 2)
+    color_ids = np.asarray(color_ids)
+
+    for color_id in np.unique(color_ids):
+        selected = is_drawn & (color_ids == color_id)[:, None]
+        if not selected.any():
+            continue
+        cv2.polylines(img,
+                      segments[selected],
+                      False,
+                      palette[color_id],
+                      limb_thick)
@@ -0,0 +1,103 @@
+from typing import Optional, Sequence, Tuple
+
+
+# (JPEG 품질, 출력 배율). 앞쪽일수록 화질이 높으며, 첫 단계는 원본
+# 그대로다. (품질 None은 OpenCV 기본값)
+TIERS = ((None, 1.0), (75, 1.0), (60, 0.75), (50, 0.5))
+
+
+class QualityController():
+
+    """
+    시청자 하나의 화질 단계를 정한다.
+
+    청크 하나를 내보내는 데 걸린 시간(drain)의 지수 이동 평균이 프레임
+    간격의 high 배를 넘거나 시청자가 청크를 건너뛰면 한 단계 내리고,
+    low 배 아래로 recover_after 프레임 연속 유지되면 한 단계 올린다.
+    단계가 바뀐 뒤 hold 프레임 동안은 판단하지 않는다.
+
+    Args:
+        - tiers: (JPEG 품질, 출력 배율) 배열.
+        - high: 단계를 내리는 drain/프레임 간격 비율.
+        - low: 단계를 올리는 drain/프레임 간격 비율.
+        - recover_after: 단계를 올리기까지 기다리는 프레임 수.
+        - hold: 단계가 바뀐 뒤 판단을 미루는 프레임 수.
+        - alpha: 지수 이동 평균의 가중치.
+    """
+
+    def __init__(
+            self,
+            tiers: Sequence[Tuple[Optional[int], float]] = TIERS,
+            high: float = 0.8,
+            low: float = 0.3,
+            recover_after: int = 30,
+            hold: int = 5,
+            alpha: float = 0.2
+        ) -> None:
+
+        if not 0 < low < high:
+            msg = ("Expected 'low' and 'high' to satisfy 0 < low < high,"
+                   f' but different values were provided.:{low}, {high}')
+            raise ValueError(msg)
+
+        self.tiers = tuple(tiers)
+        self.level = 0
+        self._high = high
+        self._low = low
+        self._recover_after = recover_after
+        self._hold = hold
+        self._alpha = alpha
+        self._drain = None
+        self._calm = 0
+        self._wait = 0
+
+    @property
+    def tier(self) -> Tuple[Optional[int], float]:
+        return self.tiers[self.level]
+
+    def update(
+            self,
+            drain: float,
+            interval: Optional[float],
+            skipped: int = 0
+        ) -> bool:
+
+        """
+        청크 하나를 내보낸 결과로 단계를 갱신한다.
+
+        Args:
+            - drain: 청크를 내보내는 데 걸린 시간. (초)
+            - interval: 원본 프레임 간격. 모르면 None. (초)
+            - skipped: 이 청크 전에 건너뛴 청크 수.
+
+        Returns:
+            - 단계가 바뀌었는지 여부.
+        """
+
+        if self._drain is None:
+            self._drain = drain
+        else:
+            self._drain += self._alpha * (drain - self._drain)
+
+        if self._wait:
+            self._wait -= 1
+            return False
+        if not interval or interval <= 0:
+            return False
+
+        ratio = self._drain / interval
+        is_behind = skipped or ratio > self._high
+        if is_behind and self.level < len(self.tiers) - 1:
+            return self._step(+1)
+
+        self._calm = self._calm + 1 if ratio < self._low else 0
+        if self._calm >= self._recover_after and self.level > 0:
+            return self._step(-1)
+        return False
+
+    def _step(self, delta: int) -> bool:
+        self.level += delta
+        self._drain = None
+        self._calm = 0
+        self._wait = self._hold
+        return True
@@ -0,0 +1,683 @@
+import asyncio
+import itertools
+import os
+import time
+import traceback
+import multiprocessing
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .codec import get_codec, reduction
+from .colors import ALL_COLORS, hex2bgr
+from .envelope import Frame
+from .plotting import plot_bounding_boxes, plot_skeletons, schema_to_limbs
+from .ring import FrameRing
+from .stream import Broadcast, Renderer, Stream
+from .timer import format_elapsed
+
+
+# --- HARDCODE ---
+COLORS = color = [hex2bgr(c[500]) for c in ALL_COLORS]
+POSE_SCHEMA = {
+    0: [1, 2,], 1: [3,], 2: [4,], 3: [], 4: [],
+    5: [6, 7, 11,], 6: [8, 12,], 7: [9,], 8: [10,], 9: [],
+    10: [], 11: [12, 13,], 12: [14,], 13: [15,], 14: [16,],
+    15: [], 16: []}
+POSE_LIMBS = schema_to_limbs(POSE_SCHEMA)
+ZONE_COLOR = (0, 0, 255)
+# ----------------
+
+MODES = ('raw', 'hpe', 'ids', 'side')
+# 디코딩 태스크의 출력 키.
+DECODED = ('decoded',)
+
+
+@dataclass
+class Overlay():
+
+    """
+    프레임 위에 그려질 내용. 타이머처럼 상태를 가진 계산은 이벤트
+    루프에서 끝내고, 픽셀 작업에 필요한 값만 담아 워커로 넘긴다.
+    (프로세스 풀에서도 pickle 가능해야 한다.)
+
+    Args:
+        - boxes: confidence 하한선을 넘은 바운딩 박스들. (n, 7)
+        - kptss: boxes에 대응하는 키포인트들. (n, 17, 3)
+        - zones: 존 폴리곤들. 픽셀 좌표. [(1, P, 2), ...]
+        - zone_boxes: 하나 이상의 존 안에 있는 바운딩 박스들. (m, 7)
+        - zone_labels: zone_boxes에 표시될 라벨들.
+    """
+
+    boxes: np.ndarray
+    kptss: np.ndarray
+    zones: List[np.ndarray]
+    zone_boxes: np.ndarray
+    zone_labels: List[str]
+
+
+class Canvas():
+
+    """
+    렌더 태스크마다 하나씩 두고 프레임마다 재사용하는 출력 버퍼.
+    side 모드의 좌우 절반은 같은 버퍼 위의 뷰이므로, 프레임마다
+    np.copy 두 번과 np.hstack 한 번으로 버퍼를 새로 할당하지 않는다.
+
+    프로세스 풀로 넘어갈 때는 버퍼를 pickle 하지 않는다. 이 경우
+    버퍼는 워커 안에서 호출마다 새로 할당된다.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = None
+        self._scaled = None
+        self._copied = None
+
+    def __getstate__(self):
+        return {'_buffer': None, '_scaled': None, '_copied': None}
+
+    def halves(
+            self,
+            shape: Tuple[int, int, int]
+        ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+
+        """
+        (height, width, channels) 크기의 프레임 두 개를 좌우로 이어
+        붙인 버퍼를 반환한다. 해상도가 바뀔 때만 새로 할당한다.
+
+        Returns:
+            - left, right: 버퍼의 좌우 절반 뷰.
+            - buffer: 전체 버퍼.
+        """
+
+        height, width, channels = shape
+        if (self._buffer is None
+                or self._buffer.shape != (height, width * 2, channels)):
+            self._buffer = np.empty(
+                shape=(height, width * 2, channels), dtype=np.uint8)
+        return self._buffer[:, :width], self._buffer[:, width:], self._buffer
+
+    def copy(self, img: np.ndarray) -> np.ndarray:
+
+        """
+        img를 재사용되는 버퍼에 복사하여 반환한다. 읽기 전용 뷰 위에
+        그려야 할 때 사용한다.
+        """
+
+        if self._copied is None or self._copied.shape != img.shape:
+            self._copied = np.empty_like(img)
+        np.copyto(self._copied, img)
+        return self._copied
+
+    def scale(self, img: np.ndarray, scale: float) -> np.ndarray:
+
+        """
+        img를 scale 배로 줄인 이미지를 반환한다. 결과는 재사용되는
+        버퍼에 쓰이며, scale이 1이면 img를 그대로 반환한다.
+        """
+
+        if scale == 1.0:
+            return img
+        height, width = img.shape[:2]
+        shape = (max(1, round(height * scale)), max(1, round(width * scale)),
+                 *img.shape[2:])
+        if self._scaled is None or self._scaled.shape != shape:
+            self._scaled = np.empty(shape, dtype=img.dtype)
+        return cv2.resize(
+            img, (shape[1], shape[0]), dst=self._scaled,
+            interpolation=cv2.INTER_AREA)
+
+
+class RenderPool():
+
+    """
+    CPU 작업(디코딩, 플로팅, 인코딩)을 이벤트 루프 밖에서 실행하는
+    풀. OpenCV는 연산 중 GIL을 해제하므로 스레드 풀로도 여러 코어를
+    사용할 수 있다.
+
+    Args:
+        - kind: 'thread' 또는 'process'.
+        - workers: 워커 수. None이면 CPU 코어 수를 따른다.
+        - max_inflight: 스트림당 동시에 실행될 수 있는 작업 수.
+    """
+
+    def __init__(
+            self,
+            kind: str = 'thread',
+            workers: Optional[int] = None,
+            max_inflight: int = 1
+        ) -> None:
+
+        if kind == 'thread':
+            self._executor: Executor = ThreadPoolExecutor(
+                workers, thread_name_prefix='vision-render')
+        elif kind == 'process':
+            self._executor = ProcessPoolExecutor(
+                workers, mp_context=multiprocessing.get_context('spawn'))
+        else:
+            msg = ("Expected kind is either 'thread' or 'process',"
+                   f' but a different value was provided.:{kind}')
+            raise ValueError(msg)
+
+        if max_inflight < 1:
+            msg = "The 'max_inflight' must be a positive integer."
+            raise ValueError(msg)
+
+        self.kind = kind
+        self._max_inflight = max_inflight
+        self._inflight = weakref.WeakKeyDictionary()
+
+    async def run(self, stream: Stream, fn: Callable, *args: Any) -> Any:
+        inflight = self._inflight.get(stream)
+        if inflight is None:
+            inflight = self._inflight[stream] = asyncio.Semaphore(
+                self._max_inflight)
+        async with inflight:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+@dataclass
+class Chunk():
+
+    """
+    출력 슬롯에 게시되는 렌더 결과.
+
+    Args:
+        - data: multipart 청크.
+        - timestamp: 원본 프레임의 캡처 시각. (unix time, 초)
+        - seq: 원본 프레임의 시퀀스 번호.
+    """
+
+    data: bytes
+    timestamp: float
+    seq: int
+
+
+@dataclass
+class Decoded():
+
+    """
+    디코딩 태스크가 출력 슬롯에 게시하는, FrameRing에 디코딩된 프레임.
+
+    Args:
+        - frame: 원본 프레임.
+        - index: 원본 프레임의 frames 슬롯 시퀀스 번호.
+        - ring: FrameRing 이름.
+        - seq: 디코딩된 프레임의 링 시퀀스 번호.
+    """
+
+    frame: Frame
+    index: int
+    ring: str
+    seq: int
+
+
+def to_multipart(
+        jpeg: Union[bytes, np.ndarray],
+        timestamp: Optional[float] = None
+    ) -> bytes:
+
+    """
+    JPEG을 multipart 청크로 감싼다. timestamp가 주어지면 캡처 시각을
+    X-Timestamp 헤더로 붙인다.
+    """
+
+    headers = b'Content-Type: image/jpeg\r\n'
+    if timestamp is not None:
+        headers += b'X-Timestamp: %.6f\r\n' % timestamp
+    return b''.join([b'--frame\r\n', headers, b'\r\n', jpeg, b'\r\n'])
+
+
+def annotate(
+        frame: Frame,
+        bbox_conf_thres: float = 0.5
+    ) -> Overlay:
+
+    """
+    프레임의 예측값과 수신 측에서 계산된 존별 체류 정보로 Overlay를
+    만든다. 하나 이상의 존 안에 있는 박스에는 가장 긴 체류 시간이
+    표시된다.
+    """
+
+    # boxes shape is (n, 7)
+    # box in boxes is (x_min, y_min, x_max, y_max, box_id, conf, class_id)
+    boxes, kptss = frame.boxes, frame.kptss
+    is_valid = boxes[:, 5] >= bbox_conf_thres
+
+    occupancy = frame.occupancy
+    if occupancy is None:
+        return Overlay(boxes[is_valid], kptss[is_valid], [], boxes[:0], [])
+
+    polygons = occupancy.zones.polygons(frame.width, frame.height)
+    is_inside = occupancy.inside.any(axis=1) & is_valid
+    zone_boxes = boxes[is_inside]
+    elapsed = np.nanmax(occupancy.elapsed[is_inside], axis=1, initial=0)
+    zone_labels = [
+        f'Person {bbox_conf:.3f} {bbox_time}'
+        for bbox_conf, bbox_time in zip(zone_boxes[:, 5],
+                                        format_elapsed(elapsed))]
+
+    return Overlay(
+        boxes[is_valid], kptss[is_valid], polygons, zone_boxes, zone_labels)
+
+
+def render_chunk(
+        jpeg: np.ndarray,
+        overlay: Overlay,
+        mode: str,
+        canvas: Optional[Canvas] = None,
+        timestamp: Optional[float] = None,
+        quality: Optional[int] = None,
+        scale: float = 1.0,
+        codec: str = 'auto'
+    ) -> bytes:
+
+    """
+    JPEG을 디코딩하여 overlay를 그리고, 다시 인코딩한 multipart 청크
+    를 반환한다. 렌더 풀의 워커에서 실행된다.
+
+    Args:
+        - timestamp: to_multipart 참고.
+        - quality: JPEG 품질. (0 ~ 100) None이면 OpenCV 기본값(95).
+        - scale: 인코딩 전 출력 배율.
+        - codec: JPEG 코덱 이름. get_codec 참고.
+    """
+
+    return render_chunk_timed(
+        jpeg, overlay, mode, canvas, timestamp, quality, scale, codec)[0]
+
+
+def render_chunk_timed(
+        jpeg: np.ndarray,
+        overlay: Overlay,
+        mode: str,
+        canvas: Optional[Canvas] = None,
+        timestamp: Optional[float] = None,
+        quality: Optional[int] = None,
+        scale: float = 1.0,
+        codec: str = 'auto'
+    ) -> Tuple[bytes, Tuple[float, float, float]]:
+
+    """
+    render_chunk와 같지만, 청크와 함께 디코딩/플로팅/인코딩 각 단계의
+    소요 시간(초)을 반환한다. 시간은 워커에서 측정하고, 기록은 이벤트
+    루프에서 한다.
+
+    raw 모드는 그릴 것이 없으므로, 축소할 때 처음부터 줄여서
+    디코딩한다.
+    """
+
+    codec = get_codec(codec)
+    reduce = reduction(scale) if mode == 'raw' else 1
+
+    t0 = time.perf_counter()
+    frame = codec.decode(jpeg, reduce)
+    t1 = time.perf_counter()
+
+    if canvas is None:
+        canvas = Canvas()
+    frame = plot(frame, overlay, mode, canvas)
+    t2 = time.perf_counter()
+
+    frame = canvas.scale(frame, scale * reduce)
+    chunk = to_multipart(codec.encode(frame, quality), timestamp)
+    t3 = time.perf_counter()
+    return chunk, (t1 - t0, t2 - t1, t3 - t2)
+
+
+# 워커 프로세스가 연결한 FrameRing. 지워진 링은 다음에 링을 열 때
+# 닫으며, 그래도 너무 많으면 오래 쓰이지 않은 것부터 닫는다.
+_RINGS: 'OrderedDict[str, FrameRing]' = OrderedDict()
+_MAX_RINGS = 64
+
+
+def _open_ring(name: str) -> FrameRing:
+    # 지워진 링은 연결이 남아 있는 동안 메모리를 차지한다.
+    for unlinked in [n for n, r in _RINGS.items() if r.is_unlinked]:
+        _RINGS.pop(unlinked).close()
+    ring = _RINGS.get(name)
+    if ring is None:
+        ring = _RINGS[name] = FrameRing(name)
+        if len(_RINGS) > _MAX_RINGS:
+            _RINGS.popitem(last=False)[1].close()
+    else:
+        _RINGS.move_to_end(name)
+    return ring
+
+
+def decode_into(
+        ring: str,
+        jpeg: np.ndarray,
+        codec: str = 'auto'
+    ) -> Tuple[int, float]:
+
+    """
+    JPEG을 디코딩하여 FrameRing의 다음 슬롯에 쓰고, 링 시퀀스 번호와
+    소요 시간(초)을 반환한다. 렌더 풀의 워커에서 실행된다. 한 링에
+    대한 호출은 동시에 실행되지 않아야 한다.
+    """
+
+    t0 = time.perf_counter()
+    seq = _open_ring(ring).write(get_codec(codec).decode(jpeg))
+    return seq, time.perf_counter() - t0
+
+
+def render_slot_timed(
+        ring: str,
+        seq: int,
+        overlay: Overlay,
+        mode: str,
+        canvas: Optional[Canvas] = None,
+        timestamp: Optional[float] = None,
+        quality: Optional[int] = None,
+        scale: float = 1.0,
+        codec: str = 'auto'
+    ) -> Optional[Tuple[bytes, Tuple[float, float]]]:
+
+    """
+    FrameRing에 디코딩된 프레임에 overlay를 그리고 인코딩한 청크를,
+    플로팅/인코딩 각 단계의 소요 시간(초)과 함께 반환한다. 렌더 풀의
+    워커에서 실행된다. 프레임은 슬롯에서 복사 없이 읽으며, 그 위에
+    직접 그리지 않도록 그리기 전에 canvas로 복사한다. 읽는 사이
+    프레임이 덮어쓰였으면 None을 반환한다.
+
+    Args:
+        - ring: FrameRing 이름.
+        - seq: 프레임의 링 시퀀스 번호.
+        - 나머지: render_chunk 참고.
+    """
+
+    try:
+        frame_ring = _open_ring(ring)
+    except FileNotFoundError:
+        # 해상도가 바뀌어 링이 다시 만들어졌다.
+        return None
+    view = frame_ring.view(seq)
+    if view is None:
+        return None
+
+    if canvas is None:
+        canvas = Canvas()
+    t0 = time.perf_counter()
+    # side 모드는 plot()이 canvas에 복사한 뒤 그린다.
+    frame = view if mode == 'side' else canvas.copy(view)
+    frame = plot(frame, overlay, mode, canvas)
+    if not frame_ring.is_current(seq):
+        return None
+    t1 = time.perf_counter()
+
+    frame = canvas.scale(frame, scale)
+    chunk = to_multipart(get_codec(codec).encode(frame, quality), timestamp)
+    return chunk, (t1 - t0, time.perf_counter() - t1)
+
+
+def render_thumbnail(
+        jpeg: np.ndarray,
+        size: Tuple[int, int],
+        width: int,
+        codec: str = 'auto'
+    ) -> bytes:
+
+    """
+    폭이 width를 넘지 않도록 줄인 JPEG을 반환한다. 가능한 만큼 처음부터
+    줄여서 디코딩한다. 렌더 풀의 워커에서 실행된다.
+
+    Args:
+        - size: 원본 해상도. (width, height)
+        - width: 썸네일의 최대 폭.
+    """
+
+    codec = get_codec(codec)
+    scale = min(1.0, width / size[0])
+    img = codec.decode(jpeg, reduction(scale))
+    height = max(1, round(size[1] * scale))
+    width = max(1, round(size[0] * scale))
+    if img.shape[:2] != (height, width):
+        img = cv2.resize(img, (width, height), interpolation=cv2.INTER_AREA)
+    return codec.encode(img)
+
+
+# 디코딩 태스크가 만드는 FrameRing 이름의 일련번호.
+_RING_IDS = itertools.count()
+
+
+async def decode_stream(
+        stream: Stream,
+        output: Broadcast,
+        pool: RenderPool,
+        n_slots: int = 4,
+        shape: Optional[Tuple[int, int, int]] = None,
+        codec: str = 'auto'
+    ) -> None:
+
+    """
+    스트림의 디코딩 태스크. 새 프레임마다 렌더 풀에서 한 번 디코딩하여
+    이 태스크가 만든 FrameRing에 쓰고, Decoded로 출력 슬롯에 게시한다.
+    같은 스트림의 렌더 태스크들은 이를 구독하여, 프레임을 다시
+    디코딩하지 않고 워커 프로세스에서 링의 슬롯을 읽는다. 링은 태스크가
+    끝날 때 지워진다.
+
+    Args:
+        - pool: 렌더 풀. 워커가 다른 프로세스여도 된다.
+        - n_slots: 링의 슬롯 수. 렌더링이 밀려 링이 한 바퀴 돌면 밀린
+                   프레임은 건너뛴다.
+        - shape: 링을 미리 만들 프레임 크기. (height, width, channels)
+                 None이면 첫 프레임의 크기로 만든다. 크기가 다른
+                 프레임이 오면 링을 다시 만든다.
+        - codec: JPEG 코덱 이름. get_codec 참고.
+    """
+
+    def open_ring(shape):
+        name = f'vision_{os.getpid()}_{next(_RING_IDS)}'
+        return FrameRing(name, n_slots, tuple(shape), create=True)
+
+    def close_ring(ring):
+        ring.unlink()
+        ring.close()
+
+    metrics = stream.metrics
+    ring = open_ring(shape) if shape is not None else None
+    try:
+        seq = 0
+        while True:
+            seq, frame = await stream.frames.wait(seq)
+            shape = (frame.height, frame.width, 3)
+            if ring is not None and ring.shape != shape:
+                close_ring(ring)
+                ring = None
+            if ring is None:
+                ring = open_ring(shape)
+            try:
+                slot, seconds = await pool.run(
+                    stream, decode_into, ring.name, frame.image, codec)
+            except Exception:
+                traceback.print_exc()
+                continue
+            metrics.observe('decode', seconds)
+            output.publish(Decoded(frame, seq, ring.name, slot))
+    finally:
+        if ring is not None:
+            close_ring(ring)
+
+
+async def render_decoded(
+        stream: Stream,
+        output: Broadcast,
+        decoded: Broadcast,
+        mode: str,
+        pool: RenderPool,
+        timestamps: bool = False,
+        quality: Optional[int] = None,
+        scale: float = 1.0,
+        codec: str = 'auto'
+    ) -> None:
+
+    """
+    render_stream과 같지만, 디코딩 태스크의 출력 슬롯(decoded)에서
+    Decoded를 받아 FrameRing의 프레임을 렌더링한다.
+    """
+
+    metrics = stream.metrics
+    canvas = Canvas()
+    seq = index = 0
+    while True:
+        seq, item = await decoded.wait(seq)
+        if index:
+            metrics.frames_skipped['render'] += item.index - index - 1
+        index, frame = item.index, item.frame
+        timestamp = frame.timestamp if timestamps else None
+        try:
+            result = await pool.run(
+                stream, render_slot_timed, item.ring, item.seq,
+                annotate(frame), mode, canvas, timestamp, quality, scale,
+                codec)
+        except Exception:
+            traceback.print_exc()
+            continue
+        if result is None:
+            metrics.frames_skipped['render'] += 1
+            continue
+        chunk, timings = result
+        output.publish(Chunk(chunk, frame.timestamp, frame.seq))
+        for stage, seconds in zip(('plot', 'encode'), timings):
+            metrics.observe(stage, seconds)
+
+
+async def render_stream(
+        stream: Stream,
+        output: Broadcast,
+        mode: str = 'side',
+        pool: Optional[RenderPool] = None,
+        timestamps: bool = False,
+        quality: Optional[int] = None,
+        scale: float = 1.0,
+        codec: str = 'auto',
+        decoder: Optional[Renderer] = None
+    ) -> None:
+
+    """
+    스트림의 렌더 태스크. 새 프레임마다 한 번 렌더링하여 그 결과를
+    Chunk로 출력 슬롯에 게시한다. 렌더링 도중 새 프레임이 여러 개 도착하면
+    최신 프레임만 처리한다. pool이 주어지면 렌더링은 풀에서 실행되며,
+    그렇지 않으면 이벤트 루프에서 직접 실행된다.
+
+    Args:
+        - mode: 렌더 모드. MODES 중 하나.
+
+                raw: 수신된 JPEG을 디코딩/인코딩 없이 그대로 전달.
+                hpe: 바운딩 박스와 키포인트.
+                ids: 레드존과 레드존 안의 바운딩 박스.
+                side: hpe와 ids를 좌우로 이어 붙임.
+        - timestamps: 각 청크에 X-Timestamp 헤더를 붙일지 여부.
+        - quality, scale: render_chunk 참고. raw 모드도 둘 중 하나가
+                          주어지면 다시 인코딩한다.
+        - codec: JPEG 코덱 이름. get_codec 참고.
+        - decoder: 디코딩 태스크. (decode_stream) 주어지면 raw 모드가
+                   아닌 렌더 태스크는 직접 디코딩하지 않고, 스트림마다
+                   하나인 디코딩 태스크가 FrameRing에 디코딩한
+                   프레임을 렌더링한다. pool이 필요하다.
+    """
+
+    if mode not in MODES:
+        msg = f'Expected mode is one of {MODES}, but {mode!r} was provided.'
+        raise ValueError(msg)
+
+    if decoder is not None and mode != 'raw':
+        async with stream.subscribe(
+                DECODED, decoder, internal=True) as decoded:
+            await render_decoded(
+                stream, output, decoded, mode, pool, timestamps, quality,
+                scale, codec)
+        return
+
+    metrics = stream.metrics
+    canvas = Canvas()
+    seq = 0
+    while True:
+        last = seq
+        seq, frame = await stream.frames.wait(seq)
+        if last:
+            metrics.frames_skipped['render'] += seq - last - 1
+        timestamp = frame.timestamp if timestamps else None
+        try:
+            if mode == 'raw' and quality is None and scale == 1.0:
+                chunk, timings = to_multipart(frame.image, timestamp), ()
+            elif pool is None:
+                chunk, timings = render_chunk_timed(
+                    frame.image, annotate(frame), mode, canvas,
+                    timestamp, quality, scale, codec)
+            else:
+                chunk, timings = await pool.run(
+                    stream, render_chunk_timed,
+                    frame.image, annotate(frame), mode, canvas,
+                    timestamp, quality, scale, codec)
+            output.publish(Chunk(chunk, frame.timestamp, frame.seq))
+            for stage, seconds in zip(('decode', 'plot', 'encode'), timings):
+                metrics.observe(stage, seconds)
+        except Exception:
+            traceback.print_exc()
+
+
+def plot(
+        frame: np.ndarray,
+        overlay: Overlay,
+        mode: str = 'side',
+        canvas: Optional[Canvas] = None,
+        kpts_conf_thres: float = 0.5,
+    ) -> np.ndarray:
+
+    """
+    raw 모드는 frame을 그대로 반환하고, hpe, ids 모드는 frame 위에
+    직접 그린다. side 모드는 frame을 canvas의 좌우 절반에 복사한 뒤
+    각각 그리며, canvas 버퍼를 반환한다.
+    """
+
+    if mode == 'raw':
+        return frame
+    if mode == 'hpe':
+        plot_hpe(frame, overlay, kpts_conf_thres)
+        return frame
+    if mode == 'ids':
+        plot_ids(frame, overlay)
+        return frame
+
+    if canvas is None:
+        canvas = Canvas()
+    frame_hpe, frame_ids, buffer = canvas.halves(frame.shape)
+    np.copyto(frame_hpe, frame)
+    np.copyto(frame_ids, frame)
+    plot_hpe(frame_hpe, overlay, kpts_conf_thres)
+    plot_ids(frame_ids, overlay)
+    return buffer
+
+
+def plot_hpe(
+        frame: np.ndarray,
+        overlay: Overlay,
+        kpts_conf_thres: float = 0.5,
+    ) -> None:
+
+    boxes = overlay.boxes
+    color_ids = boxes[:, 4].astype(int) % len(COLORS)
+    labels = [f'Person {bbox_conf:.3f}' for bbox_conf in boxes[:, 5]]
+    plot_skeletons(
+        frame, overlay.kptss, color_ids, COLORS, POSE_LIMBS, kpts_conf_thres)
+    plot_bounding_boxes(
+        frame, boxes[:, :4], color_ids, COLORS, labels=labels)
+
+
+def plot_ids(frame: np.ndarray, overlay: Overlay) -> None:
+    if overlay.zones:
+        cv2.polylines(frame, overlay.zones, True, ZONE_COLOR, 2)
+    boxes = overlay.zone_boxes
+    color_ids = boxes[:, 4].astype(int) % len(COLORS)
+    plot_bounding_boxes(
+        frame, boxes[:, :4], color_ids, COLORS, labels=overlay.zone_labels)
@@ -0,0 +1,361 @@
+"""
+같은 호스트의 프로세스끼리 공유 메모리로 메시지를 주고받는 링 버퍼.
+ByteRing은 가변 길이 메시지를, FrameRing은 디코딩된 프레임을 담는다.
+
+하나의 공유 메모리 세그먼트는 다음과 같이 구성된다. 모든 값은
+little-endian 이다.
+
+    ┌──────────────────────────────┐
+    │ header (64 bytes)            │ magic, n_slots, slot_size, write_seq
+    ├──────────────────────────────┤
+    │ slot 0 header (16 bytes)     │ seq, length
+    │ slot 0 data (slot_size)      │
+    ├──────────────────────────────┤
+    │ ...                          │
+    └──────────────────────────────┘
+
+쓰는 쪽은 하나이며, 각 슬롯은 seqlock으로 보호된다. 슬롯의 seq는
+쓰는 동안 홀수, 다 쓴 뒤 짝수가 되므로, 읽는 쪽은 읽기 전후의 seq가
+같은 짝수일 때만 읽은 값을 사용한다. 읽는 쪽은 락을 잡지 않으며,
+쓰는 쪽은 읽는 쪽을 기다리지 않는다.
+
+세그먼트는 프로세스가 종료되어도 지워지지 않으며, 같은 이름으로 다시
+열면 재사용된다. 워커들이 서로 다른 시점에 재시작되어도 세그먼트가
+사라지지 않게 하기 위함이다. 지우려면 unlink()를 호출한다.
+"""
+
+
+import struct
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+# 레이아웃이 바뀌면 MAGIC도 바꾸어, 이전 레이아웃으로 남아 있는
+# 세그먼트를 잘못 읽지 않게 한다.
+MAGIC = b'VSR2'
+
+# magic, n_slots, slot_size, write_seq. 시퀀스 번호는 8 bytes 경계에
+# 두어 한 번의 정렬된 쓰기로 갱신되게 한다. (슬롯 헤더도 같다.)
+HEADER = struct.Struct('<4sII4xQ')
+HEADER_SIZE = 64
+WRITE_SEQ_OFFSET = 16
+# seq, length
+SLOT_HEADER = struct.Struct('<QI4x')
+SEQ = struct.Struct('<Q')
+
+
+def _stride(header_size: int, data_size: int) -> int:
+
+    """ 슬롯 간격. 슬롯마다 seq가 8 bytes 경계에 오도록 올림한다. """
+
+    return header_size + -(-data_size // 8) * 8
+
+
+class ByteRing():
+
+    """
+    가변 길이 바이트 메시지를 담는 공유 메모리 링 버퍼. 마지막
+    n_slots개의 메시지만 남으며, 읽는 쪽은 항상 가장 최근 메시지를
+    읽는다. (latest-wins)
+
+    Args:
+        - name: 공유 메모리 세그먼트 이름.
+        - n_slots: 슬롯 수. create=True일 때만 사용된다.
+        - slot_size: 슬롯 하나에 담을 수 있는 최대 메시지 크기.
+                     create=True일 때만 사용된다.
+        - create: True면 세그먼트를 새로 만든다. 같은 이름의 세그먼트가
+                  이미 있으면 FileExistsError가 발생한다. False면 기존
+                  세그먼트에 연결하며, 없으면 FileNotFoundError가
+                  발생한다.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            n_slots: int = 4,
+            slot_size: int = 1 << 20,
+            create: bool = False
+        ) -> None:
+
+        if create:
+            if n_slots < 2:
+                msg = ('Expected n_slots is at least 2,'
+                       f' but a different value was provided.:{n_slots}')
+                raise ValueError(msg)
+            size = HEADER_SIZE + n_slots * _stride(
+                SLOT_HEADER.size, slot_size)
+            self._shm = shared_memory.SharedMemory(name, True, size)
+            HEADER.pack_into(self._shm.buf, 0, MAGIC, n_slots, slot_size, 0)
+        else:
+            self._shm = shared_memory.SharedMemory(name)
+            magic, n_slots, slot_size, _ = HEADER.unpack_from(self._shm.buf)
+            if magic != MAGIC:
+                self._shm.close()
+                msg = (f'Expected magic is {MAGIC!r},'
+                       f' but {magic!r} was provided.')
+                raise ValueError(msg)
+        # 프로세스가 종료될 때 resource tracker가 세그먼트를 지우지
+        # 않도록 한다.
+        resource_tracker.unregister(self._shm._name, 'shared_memory')
+
+        self.name = name
+        self.n_slots = n_slots
+        self.slot_size = slot_size
+        self._stride = _stride(SLOT_HEADER.size, slot_size)
+        self._buf = self._shm.buf
+
+    @classmethod
+    def open(
+            cls,
+            name: str,
+            n_slots: int = 4,
+            slot_size: int = 1 << 20
+        ) -> 'ByteRing':
+
+        """
+        세그먼트가 있으면 연결하고, 없으면 새로 만든다. 이미 있는
+        세그먼트의 n_slots, slot_size는 인자와 다를 수 있다.
+        """
+
+        try:
+            return cls(name)
+        except FileNotFoundError:
+            pass
+        try:
+            return cls(name, n_slots, slot_size, create=True)
+        except FileExistsError:
+            # 다른 프로세스가 먼저 만들었다.
+            return cls(name)
+
+    @property
+    def seq(self) -> int:
+
+        """ 마지막으로 쓰인 메시지의 시퀀스 번호. 쓰인 적이 없으면 0. """
+
+        return SEQ.unpack_from(self._buf, WRITE_SEQ_OFFSET)[0]
+
+    def _slot_offset(self, seq: int) -> int:
+        index = seq % self.n_slots
+        return HEADER_SIZE + index * self._stride
+
+    def write(self, data: bytes) -> int:
+
+        """
+        메시지를 다음 슬롯에 쓰고 시퀀스 번호를 반환한다. 쓰는 쪽은
+        세그먼트마다 하나여야 한다.
+        """
+
+        if len(data) > self.slot_size:
+            msg = (f'Expected message size is at most {self.slot_size},'
+                   f' but a different value was provided.:{len(data)}')
+            raise ValueError(msg)
+
+        seq = self.seq + 1
+        offset = self._slot_offset(seq)
+        SEQ.pack_into(self._buf, offset, 2 * seq - 1)
+        start = offset + SLOT_HEADER.size
+        self._buf[start:start + len(data)] = data
+        SLOT_HEADER.pack_into(self._buf, offset, 2 * seq, len(data))
+        SEQ.pack_into(self._buf, WRITE_SEQ_OFFSET, seq)
+        return seq
+
+    def read(self, after: int = 0) -> Optional[Tuple[int, bytes]]:
+
+        """
+        after보다 새로운 메시지가 있으면 가장 최근 메시지를 복사하여
+        (시퀀스 번호, 메시지)로 반환한다. 없으면 None.
+        """
+
+        while True:
+            seq = self.seq
+            if seq == after:
+                return None
+            offset = self._slot_offset(seq)
+            version, length = SLOT_HEADER.unpack_from(self._buf, offset)
+            if version != 2 * seq:
+                # 읽는 사이 쓰는 쪽이 링을 한 바퀴 돌았다.
+                continue
+            start = offset + SLOT_HEADER.size
+            data = bytes(self._buf[start:start + length])
+            if SEQ.unpack_from(self._buf, offset)[0] == version:
+                return seq, data
+
+    def close(self) -> None:
+        self._buf = None
+        self._shm.close()
+
+    def unlink(self) -> None:
+        # SharedMemory.unlink()은 resource tracker에서도 빼므로, 뺐던
+        # 이름을 다시 등록해 둔다.
+        resource_tracker.register(self._shm._name, 'shared_memory')
+        self._shm.unlink()
+
+
+# magic, n_slots, height, width, channels, write_seq, is_unlinked.
+# write_seq는 HEADER와 같이 8 bytes 경계에 둔다.
+FRAME_HEADER = struct.Struct('<4sIIII4xQI')
+FRAME_MAGIC = b'VSI2'
+FRAME_WRITE_SEQ_OFFSET = 24
+FRAME_IS_UNLINKED_OFFSET = 32
+# 슬롯 헤더. 이미지가 캐시 라인 경계에서 시작하도록 64 bytes로 둔다.
+FRAME_SLOT_HEADER_SIZE = 64
+
+
+class FrameRing():
+
+    """
+    디코딩된 프레임을 담는 공유 메모리 링 버퍼. 슬롯마다 같은 크기의
+    uint8 이미지 하나를 담으며, 읽는 쪽은 복사 없이 슬롯 위의 NumPy
+    뷰로 읽는다. 쓰는 쪽은 하나이며, ByteRing과 같은 seqlock으로
+    보호된다.
+
+    뷰는 쓰는 쪽이 링을 한 바퀴 돌아 같은 슬롯에 쓰기 시작하면
+    덮어쓰이므로, 읽는 쪽은 뷰를 다 읽은 뒤 is_current()로 확인해야
+    한다.
+
+        seq = ring.seq
+        view = ring.view(seq)
+        np.copyto(dst, view)
+        if not ring.is_current(seq):
+            ...  # dst는 다른 프레임과 섞였을 수 있다.
+
+    세그먼트는 만든 쪽이 unlink()로 지운다. 지워진 세그먼트도 연결된
+    프로세스가 모두 닫을 때까지 메모리에 남으므로, 읽는 쪽은
+    is_unlinked가 참인 링을 닫아야 한다.
+
+    Args:
+        - name: 공유 메모리 세그먼트 이름.
+        - n_slots: 슬롯 수. create=True일 때만 사용된다.
+        - shape: 슬롯 이미지의 (height, width, channels). create=True
+                 일 때만 사용된다.
+        - create: ByteRing 참고.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            n_slots: int = 4,
+            shape: Tuple[int, int, int] = (360, 640, 3),
+            create: bool = False
+        ) -> None:
+
+        if create:
+            if n_slots < 2:
+                msg = ('Expected n_slots is at least 2,'
+                       f' but a different value was provided.:{n_slots}')
+                raise ValueError(msg)
+            size = HEADER_SIZE + n_slots * _stride(
+                FRAME_SLOT_HEADER_SIZE, int(np.prod(shape)))
+            self._shm = shared_memory.SharedMemory(name, True, size)
+            FRAME_HEADER.pack_into(
+                self._shm.buf, 0, FRAME_MAGIC, n_slots, *shape, 0, 0)
+        else:
+            self._shm = shared_memory.SharedMemory(name)
+            magic, n_slots, *shape, _, _ = FRAME_HEADER.unpack_from(
+                self._shm.buf)
+            if magic != FRAME_MAGIC:
+                self._shm.close()
+                msg = (f'Expected magic is {FRAME_MAGIC!r},'
+                       f' but {magic!r} was provided.')
+                raise ValueError(msg)
+        # 세그먼트의 수명은 만든 쪽이 관리한다. ByteRing 참고.
+        resource_tracker.unregister(self._shm._name, 'shared_memory')
+
+        self.name = name
+        self.n_slots = n_slots
+        self.shape = tuple(shape)
+        self._buf = self._shm.buf
+        stride = _stride(FRAME_SLOT_HEADER_SIZE, int(np.prod(self.shape)))
+        # 슬롯별 seq와 이미지. 모두 세그먼트 위의 뷰이다.
+        self._write_seq = np.ndarray(
+            (), '<u8', self._buf, FRAME_WRITE_SEQ_OFFSET)
+        self._is_unlinked = np.ndarray(
+            (), '<u4', self._buf, FRAME_IS_UNLINKED_OFFSET)
+        self._seqs = np.ndarray(
+            (n_slots,), '<u8', self._buf, HEADER_SIZE, (stride,))
+        self._frames = [
+            np.ndarray(
+                self.shape, np.uint8, self._buf,
+                HEADER_SIZE + i * stride + FRAME_SLOT_HEADER_SIZE)
+            for i in range(n_slots)]
+
+    @property
+    def seq(self) -> int:
+
+        """ 마지막으로 쓰인 프레임의 시퀀스 번호. 쓰인 적이 없으면 0. """
+
+        return int(self._write_seq)
+
+    @property
+    def is_unlinked(self) -> bool:
+
+        """ 만든 쪽이 unlink()로 세그먼트를 지웠는지 여부. """
+
+        return bool(self._is_unlinked)
+
+    def begin(self) -> Tuple[int, np.ndarray]:
+
+        """
+        다음 슬롯에 쓰기 시작한다. (시퀀스 번호, 쓸 수 있는 슬롯 뷰)를
+        반환하며, 슬롯을 다 채운 뒤 commit()을 호출해야 한다. 디코딩
+        결과를 복사하거나 cv2.resize(dst=...)로 슬롯에 직접 쓸 수 있다.
+        """
+
+        seq = self.seq + 1
+        self._seqs[seq % self.n_slots] = 2 * seq - 1
+        return seq, self._frames[seq % self.n_slots]
+
+    def commit(self, seq: int) -> None:
+        self._seqs[seq % self.n_slots] = 2 * seq
+        self._write_seq[()] = seq
+
+    def write(self, img: np.ndarray) -> int:
+
+        """ 이미지를 다음 슬롯에 복사하고 시퀀스 번호를 반환한다. """
+
+        if img.shape != self.shape:
+            msg = (f'Expected shape is {self.shape},'
+                   f' but a different value was provided.:{img.shape}')
+            raise ValueError(msg)
+        seq, slot = self.begin()
+        np.copyto(slot, img)
+        self.commit(seq)
+        return seq
+
+    def is_current(self, seq: int) -> bool:
+
+        """ seq 프레임이 아직 슬롯에 온전히 남아 있는지 여부. """
+
+        return int(self._seqs[seq % self.n_slots]) == 2 * seq
+
+    def view(self, seq: int) -> Optional[np.ndarray]:
+
+        """
+        seq 프레임이 담긴 슬롯의 읽기 전용 뷰. 이미 덮어쓰였거나 아직
+        쓰이는 중이면 None.
+        """
+
+        if not self.is_current(seq):
+            return None
+        view = self._frames[seq % self.n_slots].view()
+        view.flags.writeable = False
+        return view
+
+    def close(self) -> None:
+        # 세그먼트 위의 뷰가 남아 있으면 닫을 수 없으므로 먼저 놓는다.
+        self._write_seq = self._seqs = self._frames = None
+        self._is_unlinked = None
+        self._buf = None
+        self._shm.close()
+
+    def unlink(self) -> None:
+        # 연결된 다른 프로세스가 링을 닫도록 알린다. close() 전에
+        # 호출해야 알릴 수 있다.
+        if self._buf is not None:
+            self._is_unlinked[()] = 1
+        # SharedMemory.unlink()은 resource tracker에서도 빼므로, 뺐던
+        # 이름을 다시 등록해 둔다.
+        resource_tracker.register(self._shm._name, 'shared_memory')
+        self._shm.unlink()
@@ -0,0 +1,257 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import (
+    Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Iterator,
+    Optional, Set, Tuple)
+
+from .metrics import StreamMetrics
+from .timer import ZoneDwell
+
+
+# 다른 스트림의 프레임으로 렌더링되는 파생 스트림(모자이크)의 이름
+# 접두사. 카메라가 아니므로 프레임 버스를 연결하지 않는다.
+DERIVED_PREFIXES = ('mosaic:',)
+
+
+class Broadcast():
+
+    """
+    가장 최근 값 하나만을 보관하는 브로드캐스트 슬롯.
+
+    publish()는 이전 값을 덮어쓰며, 대기 중인 모든 구독자를 깨운다.
+    구독자는 자신이 마지막으로 읽은 시퀀스 번호를 wait()에 전달하고,
+    그보다 새로운 값이 생기면 (시퀀스 번호, 값)을 반환받는다. 값을
+    꺼내가지 않으므로 구독자끼리 프레임을 빼앗지 않으며, 느린 구독자
+    는 밀린 값 대신 항상 최신 값으로 건너뛴다.
+    """
+
+    def __init__(self) -> None:
+        self._value = None
+        self._seq = 0
+        self._event = asyncio.Event()
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    @property
+    def value(self) -> Any:
+        return self._value
+
+    def publish(self, value: Any) -> None:
+        self._value = value
+        self._seq += 1
+        event, self._event = self._event, asyncio.Event()
+        event.set()
+
+    async def wait(self, seq: int = 0) -> Tuple[int, Any]:
+        while self._seq == seq:
+            await self._event.wait()
+        return self._seq, self._value
+
+
+Renderer = Callable[['Stream', Broadcast], Awaitable[None]]
+
+
+class Stream():
+
+    """
+    카메라 하나에 대응하는 이름 있는 스트림.
+
+    수신된 프레임은 frames 슬롯에 게시된다. 렌더링 결과는 출력 키
+    별로 하나의 출력 슬롯에 게시되며, 각 출력 슬롯은 구독자가 있는
+    동안에만 살아 있는 렌더 태스크 하나가 채운다. 따라서 시청자 수와
+    무관하게 프레임당 렌더링/인코딩은 한 번만 수행된다.
+
+    존별 체류 시간(dwell)과 파이프라인 지표(metrics)도 스트림마다
+    따로 관리된다.
+
+    Args:
+        - name: 스트림 이름. 웹소켓 경로의 camera_id와 같다.
+        - dwell_grace_period: ZoneDwell 참고.
+        - on_dwell_events: ZoneDwell의 on_events 참고.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            dwell_grace_period: float = 1.0,
+            on_dwell_events: Optional[Callable] = None
+        ) -> None:
+
+        self.name = name
+        self.frames = Broadcast()
+        self.zones = None  # ZoneMask, 수신 측에서 갱신한다.
+        self.dwell = ZoneDwell(
+            dwell_grace_period, on_events=on_dwell_events)
+        self.metrics = StreamMetrics()
+        self.relay = None  # 프레임 버스에서 프레임을 받아오는 태스크.
+        # 마지막으로 버스 게시 실패를 로그로 남긴 시각. (ingest 참고)
+        self.bus_error_logged_at: Optional[float] = None
+        self.last_active = time.monotonic()
+        self._refs = 0
+        self._outputs: Dict[Hashable, Broadcast] = {}
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self._viewers: Dict[Hashable, int] = {}
+        self._internal: Set[Hashable] = set()
+
+    @property
+    def viewers(self) -> int:
+        return sum(n for key, n in self._viewers.items()
+                   if key not in self._internal)
+
+    @property
+    def is_idle(self) -> bool:
+        return not self._refs and not self._viewers
+
+    def attach(self) -> None:
+
+        """
+        스트림을 사용 중으로 표시한다. 웹소켓 연결처럼 스트림을 오래
+        붙잡고 있는 쪽은 attach()/detach()로 감싸야, 사용 중인 스트림이
+        정리되지 않는다.
+        """
+
+        self._refs += 1
+        self.last_active = time.monotonic()
+
+    def detach(self) -> None:
+        self._refs -= 1
+        self.last_active = time.monotonic()
+
+    def publish(self, frame: Any) -> None:
+        self.last_active = time.monotonic()
+        self.frames.publish(frame)
+
+    @asynccontextmanager
+    async def subscribe(
+            self,
+            key: Hashable,
+            renderer: Renderer,
+            internal: bool = False
+        ) -> AsyncIterator[Broadcast]:
+
+        """
+        출력 키에 해당하는 출력 슬롯을 구독한다. 첫 구독자가 들어올
+        때 렌더 태스크를 시작하고, 마지막 구독자가 나갈 때 취소한다.
+
+        Args:
+            - key: 출력 키. 같은 키의 구독자는 렌더 결과를 공유한다.
+            - renderer: 렌더 코루틴 함수. renderer(stream, output)는
+                        frames 슬롯을 읽어 output 슬롯에 게시하는
+                        루프를 실행한다.
+            - internal: 시청자가 아닌 렌더 태스크의 구독인지 여부.
+                        viewers에 세지 않는다.
+        """
+
+        self.last_active = time.monotonic()
+        output = self._outputs.get(key)
+        if output is None:
+            output = self._outputs[key] = Broadcast()
+        if not self._viewers.get(key):
+            self._viewers[key] = 0
+            if internal:
+                self._internal.add(key)
+            self._tasks[key] = asyncio.create_task(renderer(self, output))
+        self._viewers[key] += 1
+        try:
+            yield output
+        finally:
+            self._viewers[key] -= 1
+            if not self._viewers[key]:
+                del self._viewers[key]
+                del self._outputs[key]
+                self._internal.discard(key)
+                self._tasks.pop(key).cancel()
+            self.last_active = time.monotonic()
+
+
+class StreamRegistry():
+
+    """
+    이름으로 스트림을 조회하며, 없으면 새로 만든다.
+
+    연결도 구독자도 없이 idle_timeout 이상 프레임이 들어오지 않은
+    스트림은 get()이 호출될 때 주기적으로 정리된다. 스트림과 함께
+    체류 시간 트래커도 사라지므로, 카메라가 많고 오래 실행되는
+    노드에서도 메모리가 일정하게 유지된다. 이때 남아 있던 트랙의 exit
+    이벤트가 발생한다.
+
+    bus가 주어지면 스트림을 만들 때 다른 워커가 수신한 프레임을 버스
+    에서 받아오는 태스크(bus.relay)를 시작하고, 정리할 때 취소한다.
+
+    bus는 카메라 스트림에만 적용되며, 파생 스트림(DERIVED_PREFIXES)
+    에는 적용되지 않는다.
+
+    on_collect가 주어지면 스트림을 정리할 때 그 스트림으로 호출한다.
+    존 캐시처럼 스트림 이름으로 따로 보관하는 상태를 함께 정리하는 데
+    사용한다.
+
+    Args:
+        - idle_timeout: 유휴 스트림을 정리하기까지의 시간. (초)
+        - dwell_grace_period: ZoneDwell 참고.
+        - on_dwell_events: ZoneDwell의 on_events 참고.
+        - bus: 프레임 버스. (bus.LocalBus)
+        - zones: 카메라 이름으로 존 마스크를 반환하는 함수. 버스에서
+                 받은 프레임의 체류 정보를 복원하는 데 사용된다.
+        - on_collect: 정리된 스트림을 받는 함수.
+    """
+
+    def __init__(
+            self,
+            idle_timeout: float = 300.0,
+            dwell_grace_period: float = 1.0,
+            on_dwell_events: Optional[Callable] = None,
+            bus: Optional[Any] = None,
+            zones: Optional[Callable] = None,
+            on_collect: Optional[Callable[[Stream], None]] = None
+        ) -> None:
+
+        self.idle_timeout = idle_timeout
+        self.dwell_grace_period = dwell_grace_period
+        self.on_dwell_events = on_dwell_events
+        self.bus = bus
+        self.zones = zones
+        self.on_collect = on_collect
+        self._streams: Dict[str, Stream] = {}
+        self._collected_at = time.monotonic()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._streams
+
+    def __iter__(self) -> Iterator[Stream]:
+        return iter(list(self._streams.values()))
+
+    def __len__(self) -> int:
+        return len(self._streams)
+
+    def get(self, name: str) -> Stream:
+        now = time.monotonic()
+        if now - self._collected_at > self.idle_timeout / 10:
+            self.collect(now)
+
+        stream = self._streams.get(name)
+        if stream is None:
+            stream = self._streams[name] = Stream(
+                name, self.dwell_grace_period, self.on_dwell_events)
+            if self.bus is not None and not name.startswith(DERIVED_PREFIXES):
+                stream.relay = self.bus.relay(
+                    stream, self.zones or (lambda name: None))
+        return stream
+
+    def collect(self, now: float = None) -> None:
+        if now is None:
+            now = time.monotonic()
+        self._collected_at = now
+        for name, stream in list(self._streams.items()):
+            if stream.is_idle and now - stream.last_active > self.idle_timeout:
+                del self._streams[name]
+                stream.dwell.close()
+                if stream.relay is not None:
+                    stream.relay.cancel()
+                if self.on_collect is not None:
+                    self.on_collect(stream)
+
+
+STREAMS = StreamRegistry()
@@ -1,29 +1,278 @@
 import time
-from typing import Iterable
+from dataclasses import dataclass
+from typing import (
+    Callable, Dict, Hashable, Iterable, List, NamedTuple, Optional)
 
+import numpy as np
 
-class Timer():
+from .zones import ZoneMask
 
-    def __init__(self) -> None:
-        self.start_time = time.time()
 
-    def get_elapsed_time(self) -> str:
-        elapsed_time = time.time() - self.start_time
-        h, r = divmod(elapsed_time, 3600)  # hours, remainders
-        m, s = divmod(r, 60)               # minutes, seconds
-        return f'{int(h):02}:{int(m):02}:{int(s):02}'
+class Tracks(NamedTuple):
+    ids: np.ndarray
+    first_seen: np.ndarray
+    last_seen: np.ndarray
 
 
-class TimerManager():
+class DwellTracker():
 
-    def __init__(self):
-        self.timers_id = set()
-        self.timers = {}
+    """
+    트랙 id별 체류 시간을 NumPy 배열로 관리한다. 프레임마다 update()
+    를 한 번 호출하면 모든 트랙이 한꺼번에 갱신된다.
 
-    def syncronize(self, timers_id: Iterable[int]):
-        timers_id = set(timers_id)
-        for timer_id in self.timers_id - timers_id:
-            del self.timers[timer_id]
-        for timer_id in timers_id - self.timers_id:
-            self.timers[timer_id] = Timer()
-        self.timers_id = timers_id
+    트랙이 보이지 않게 된 뒤에도 grace_period 동안은 지워지지 않으므로,
+    id가 잠깐 사라졌다 나타나도(flicker) 타이머가 초기화되지 않는다.
+    시간은 단조 시계(time.monotonic)로 측정한다.
+
+    update()가 끝나면 이번 호출에서 새로 생긴 트랙이 entered에, 지워진
+    트랙이 exited에 남는다.
+
+    Args:
+        - grace_period: 보이지 않는 트랙을 유지하는 시간. (초)
+        - clock: 현재 시각을 반환하는 함수.
+    """
+
+    def __init__(
+            self,
+            grace_period: float = 1.0,
+            clock: Callable[[], float] = time.monotonic
+        ) -> None:
+
+        self.grace_period = grace_period
+        self._clock = clock
+        # id 오름차순으로 정렬된 상태를 유지한다.
+        self._ids = np.empty(0, dtype=np.int64)
+        self._first_seen = np.empty(0, dtype=np.float64)
+        self._last_seen = np.empty(0, dtype=np.float64)
+        self.entered = np.empty(0, dtype=np.int64)
+        self.exited = Tracks(self._ids, self._first_seen, self._last_seen)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids
+
+    def update(self, ids: Iterable[int], now: float = None) -> np.ndarray:
+
+        """
+        현재 프레임에서 보인 트랙 id들로 트랙을 갱신한다.
+
+        Args:
+            - ids: 현재 프레임의 트랙 id 배열. (N,)
+            - now: 현재 시각. None이면 clock()을 사용한다.
+
+        Returns:
+            - ids 순서대로의 체류 시간 배열. (N,) 초
+        """
+
+        if now is None:
+            now = self._clock()
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        seen, inverse = np.unique(ids, return_inverse=True)
+
+        # grace_period 를 넘긴 트랙은 지운다. 다시 나타났더라도 새
+        # 트랙으로 취급한다.
+        is_alive = self._last_seen >= now - self.grace_period
+        self.exited = Tracks(
+            self._ids[~is_alive],
+            self._first_seen[~is_alive],
+            self._last_seen[~is_alive])
+        self._ids = self._ids[is_alive]
+        self._first_seen = self._first_seen[is_alive]
+        self._last_seen = self._last_seen[is_alive]
+
+        # 이미 있는 트랙은 last_seen만 갱신하고, 새 트랙을 추가한다.
+        pos = np.searchsorted(self._ids, seen)
+        is_known = pos < len(self._ids)
+        is_known[is_known] = self._ids[pos[is_known]] == seen[is_known]
+        self._last_seen[pos[is_known]] = now
+        new_ids = self.entered = seen[~is_known]
+        if len(new_ids):
+            all_ids = np.concatenate([self._ids, new_ids])
+            first_seen = np.concatenate([
+                self._first_seen, np.full(len(new_ids), now)])
+            last_seen = np.concatenate([
+                self._last_seen, np.full(len(new_ids), now)])
+            order = np.argsort(all_ids, kind='stable')
+            self._ids = all_ids[order]
+            self._first_seen = first_seen[order]
+            self._last_seen = last_seen[order]
+
+        pos = np.searchsorted(self._ids, seen)
+        return (now - self._first_seen[pos])[inverse]
+
+    def close(self) -> Tracks:
+
+        """ 남아 있는 모든 트랙을 지우고, 지워진 트랙들을 반환한다. """
+
+        tracks = Tracks(self._ids, self._first_seen, self._last_seen)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._first_seen = np.empty(0, dtype=np.float64)
+        self._last_seen = np.empty(0, dtype=np.float64)
+        return tracks
+
+
+def format_elapsed(elapsed: np.ndarray) -> List[str]:
+
+    """ 체류 시간(초) 배열을 'HH:MM:SS' 문자열 배열로 변환한다. """
+
+    elapsed = np.asarray(elapsed).astype(np.int64)
+    h, r = np.divmod(elapsed, 3600)  # hours, remainders
+    m, s = np.divmod(r, 60)          # minutes, seconds
+    return [f'{h:02}:{m:02}:{s:02}' for h, m, s in zip(h, m, s)]
+
+
+@dataclass
+class Occupancy():
+
+    """
+    한 프레임의 존별 체류 정보.
+
+    Args:
+        - zones: 계산에 사용된 존 마스크.
+        - inside: 각 바운딩 박스가 각 존 안에 있는지 여부. (N, Z)
+        - elapsed: 각 바운딩 박스의 존별 체류 시간. 존 밖이면 nan. (N, Z)
+    """
+
+    zones: ZoneMask
+    inside: np.ndarray
+    elapsed: np.ndarray
+
+
+@dataclass
+class DwellEvent():
+
+    """
+    존 입장/퇴장 이벤트.
+
+    Args:
+        - kind: 'enter' 또는 'exit'.
+        - zone_id: 존 id.
+        - track_id: 트랙 id.
+        - timestamp: 입장 시각 또는 마지막으로 존 안에서 보인 시각.
+                     (time.time() 기준 초)
+        - duration: 체류 시간. exit 이벤트에만 있다. (초)
+    """
+
+    kind: str
+    zone_id: Hashable
+    track_id: int
+    timestamp: float
+    duration: Optional[float] = None
+
+
+class ZoneDwell():
+
+    """
+    스트림 하나의 존별 DwellTracker 묶음. 트랙 id는 카메라마다, 체류
+    시간은 존마다 따로 관리되므로 다른 카메라나 다른 존의 같은 id가
+    서로의 타이머를 초기화하지 않는다. 사라진 존의 트래커는 지워진다.
+
+    on_events가 주어지면 트랙이 존에 들어오거나 grace_period를 넘겨
+    사라질 때마다 DwellEvent 리스트로 호출된다. 존이나 스트림이 사라져
+    트래커가 지워질 때에도 남은 트랙의 exit 이벤트가 발생한다.
+
+    Args:
+        - grace_period: DwellTracker 참고.
+        - clock: DwellTracker 참고.
+        - on_events: 이벤트를 받을 함수. 이벤트 루프를 막지 않아야 한다.
+    """
+
+    def __init__(
+            self,
+            grace_period: float = 1.0,
+            clock: Callable[[], float] = time.monotonic,
+            on_events: Optional[Callable[[List[DwellEvent]], None]] = None
+        ) -> None:
+
+        self.grace_period = grace_period
+        self.on_events = on_events
+        self._clock = clock
+        self.trackers: Dict[Hashable, DwellTracker] = {}
+
+    def close(self) -> None:
+
+        """ 모든 트래커를 지우고, 남은 트랙의 exit 이벤트를 발생시킨다. """
+
+        self._close(list(self.trackers))
+
+    def update(
+            self,
+            boxes: np.ndarray,
+            zones: Optional[ZoneMask],
+            width: int,
+            height: int,
+            bbox_conf_thres: float = 0.5
+        ) -> Optional[Occupancy]:
+
+        """
+        프레임 하나의 바운딩 박스들로 모든 존의 트래커를 갱신한다.
+
+        Args:
+            - boxes: 바운딩 박스 배열. (N, 7)
+            - zones: 카메라의 존 마스크.
+            - width, height: 스트림 해상도.
+            - bbox_conf_thres: confidence 하한선. 이보다 낮은 박스는
+                               어느 존에도 속하지 않는다.
+
+        Returns:
+            - Occupancy. 존이 없다면 None.
+        """
+
+        if zones is None or not len(zones) or not width:
+            self.close()
+            return None
+
+        self._close(self.trackers.keys() - set(zones.ids))
+
+        events = []
+        now = self._clock()
+        ids = boxes[:, 4].astype(np.int64)
+        inside = zones.lookup(boxes[:, :4], width, height)
+        inside &= (boxes[:, 5] >= bbox_conf_thres)[:, None]
+        elapsed = np.full(inside.shape, np.nan, dtype=np.float32)
+        for i, zone_id in enumerate(zones.ids):
+            tracker = self.trackers.get(zone_id)
+            if tracker is None:
+                tracker = self.trackers[zone_id] = DwellTracker(
+                    self.grace_period, self._clock)
+            is_inside = inside[:, i]
+            elapsed[is_inside, i] = tracker.update(ids[is_inside], now)
+            if self.on_events is not None:
+                events += self._events(zone_id, tracker.entered, tracker.exited)
+        if events:
+            self.on_events(events)
+
+        return Occupancy(zones, inside, elapsed)
+
+    def _close(self, zone_ids: Iterable[Hashable]) -> None:
+        events = []
+        for zone_id in zone_ids:
+            tracks = self.trackers.pop(zone_id).close()
+            if self.on_events is not None:
+                events += self._events(zone_id, (), tracks)
+        if events:
+            self.on_events(events)
+
+    def _events(
+            self,
+            zone_id: Hashable,
+            entered: np.ndarray,
+            exited: Tracks
+        ) -> List[DwellEvent]:
+
+        if not len(entered) and not len(exited.ids):
+            return []
+        # 단조 시계의 시각을 벽시계 시각으로 옮긴다.
+        now = self._clock()
+        offset = time.time() - now
+        events = [
+            DwellEvent('enter', zone_id, int(track_id), now + offset)
+            for track_id in entered]
+        events += [
+            DwellEvent('exit', zone_id, int(track_id), float(last + offset),
+                       float(last - first))
+            for track_id, first, last in zip(*exited)]
+        return events
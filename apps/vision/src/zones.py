@@ -0,0 +1,95 @@
+from typing import Hashable, List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+
+class ZoneMask():
+
+    """
+    카메라 하나의 존(폴리곤)들을 한 장의 비트마스크로 래스터화한다.
+    픽셀 값의 i번째 비트는 그 픽셀이 i번째 존에 속하는지를 나타내므로,
+    겹치는 존도 표현할 수 있다. 마스크는 해상도가 바뀔 때만 다시
+    만들어지며, 모든 박스와 모든 존의 포함 관계는 한 번의 인덱싱으로
+    계산된다.
+
+    Args:
+        - zones: (존 id, 폴리곤) 배열. 폴리곤은 이미지 크기로 정규화된
+                 (0 ~ 1) 꼭짓점 좌표 배열이다. (P, 2)
+    """
+
+    MAX_ZONES = 32
+
+    def __init__(self, zones: Sequence[Tuple[Hashable, np.ndarray]]) -> None:
+        if len(zones) > self.MAX_ZONES:
+            msg = (f'Expected number of zones is at most {self.MAX_ZONES},'
+                   f' but a different value was provided.:{len(zones)}')
+            raise ValueError(msg)
+
+        self.ids = [zone_id for zone_id, _ in zones]
+        self._polygons = [
+            np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+            for _, polygon in zones]
+        self._size = None
+        self._mask = None
+        self._pixel_polygons = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def resize(self, width: int, height: int) -> None:
+
+        """ 해상도가 바뀌었을 때만 마스크를 다시 래스터화한다. """
+
+        if self._size == (width, height):
+            return
+
+        scale = np.array([width, height], dtype=np.float64)
+        polygons = [
+            np.round(polygon * scale).astype(np.int32).reshape(1, -1, 2)
+            for polygon in self._polygons]
+
+        mask = np.zeros(shape=(height, width), dtype=np.uint32)
+        layer = np.empty(shape=(height, width), dtype=np.uint8)
+        for i, polygon in enumerate(polygons):
+            layer.fill(0)
+            cv2.fillPoly(layer, polygon, 1)
+            mask[layer != 0] |= np.uint32(1 << i)
+
+        self._size = (width, height)
+        self._mask = mask
+        self._pixel_polygons = polygons
+
+    def polygons(self, width: int, height: int) -> List[np.ndarray]:
+
+        """ 해상도에 맞춘 픽셀 좌표 폴리곤들. cv2.polylines 에 사용. """
+
+        self.resize(width, height)
+        return self._pixel_polygons
+
+    def lookup(
+            self,
+            xyxys: np.ndarray,
+            width: int,
+            height: int
+        ) -> np.ndarray:
+
+        """
+        바운딩 박스 중심점이 각 존에 속하는지 계산한다. 이미지 밖의
+        중심점은 가장 가까운 경계 픽셀로 옮겨진다.
+
+        Args:
+            - xyxys: 바운딩 박스 좌상단, 우하단 좌표 배열. (N, 4)
+            - width, height: 스트림 해상도.
+
+        Returns:
+            - 포함 관계 배열. (N, Z) bool
+        """
+
+        self.resize(width, height)
+        xyxys = xyxys.astype(int)
+        cx = np.clip((xyxys[:, 0] + xyxys[:, 2]) >> 1, 0, width - 1)
+        cy = np.clip((xyxys[:, 1] + xyxys[:, 3]) >> 1, 0, height - 1)
+        bits = self._mask[cy, cx]
+        shifts = np.arange(len(self.ids), dtype=np.uint32)
+        return ((bits[:, None] >> shifts) & 1).astype(bool)
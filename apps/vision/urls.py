@@ -5,6 +5,10 @@ from . import views
 
 app_name = 'vision'
 urlpatterns = [
-    path('', views.vision, name='vision'),
-    path('stream/', views.stream, name='stream'),
+    path('metrics', views.metrics, name='metrics'),
+    path('mosaic/', views.mosaic, name='mosaic'),
+    path('<str:camera_id>/', views.vision, name='vision'),
+    path('<str:camera_id>/stream/', views.stream, name='stream'),
+    path('<str:camera_id>/overlay/', views.overlay, name='overlay'),
+    path('<str:camera_id>/snapshot.jpg', views.snapshot, name='snapshot'),
 ]
\ No newline at end of file
@@ -1,132 +1,237 @@
-import json
-import logging
+import asyncio
+import time
 import traceback
-from typing import Dict, Any
+import weakref
+from functools import partial
 
+from django.conf import settings
 from django.shortcuts import render
-from django.http import StreamingHttpResponse
-import cv2
-import numpy as np
-
-from .src.colors import ALL_COLORS, hex2bgr
-from .src.plotting import plot_bounding_box, plot_keypoints
-from .src.timer import TimerManager
-from .consumers import QUEUE
-
-
-def vision(request):
-    return render(request, 'vision/vision.html')
-
-
-async def stream(request):
-    async def generate_image(delimiter: str=b'\xFF\xFE\xFF\xFE'):
-        try:
-            while True:
-                bytes_data = await QUEUE.get()
-
-                delimiter_index = bytes_data.find(delimiter)
-                frame = bytes_data[:delimiter_index]
-                preds = bytes_data[delimiter_index + len(delimiter):]
-
-                frame = np.frombuffer(bytes_data, dtype=np.uint8)
-                frame = cv2.imdecode(frame, cv2.IMREAD_ANYCOLOR)
-                preds = json.loads(preds.decode('utf-8'))
-
-                # -------- START --------
-                # args: frame, preds
-                #boxes = np.array(preds['boxes'], dtype=np.float32)
-                #kptss = np.array(preds['kptss'], dtype=np.float32)
-
-                #for box in boxes:
-                #    p1 = tuple(box[:2].astype(int))
-                #    p2 = tuple(box[2:4].astype(int))
-                #    cv2.rectangle(frame, p1, p2, (0, 255, 0), 1)
-                # out: frame
-                # --------- END ---------
-
-                frame = plot(frame, preds)
-
-                is_encoded, jpeg = cv2.imencode('.jpeg', frame)
-                if not is_encoded:
-                    raise RuntimeError('jpeg encode error.')
-                jpeg = jpeg.tobytes()
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n'
-                       + jpeg + b'\r\n')
-        except:
-            traceback.print_exc()
+from django.http import (
+    Http404, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse)
+from django.views.decorators.http import condition
+
+from .src.colors import ALL_COLORS, hex2rgb
+from .src.metrics import exposition
+from .src.mosaic import render_mosaic
+from .src.quality import TIERS, QualityController
+from .src.render import (
+    MODES, POSE_SCHEMA, RenderPool, decode_stream, render_stream,
+    render_thumbnail)
+from .src.stream import STREAMS
+
+
+POOL = RenderPool(
+    kind=getattr(settings, 'VISION_RENDER_EXECUTOR', 'thread'),
+    workers=getattr(settings, 'VISION_RENDER_WORKERS', None),
+    max_inflight=getattr(settings, 'VISION_RENDER_MAX_INFLIGHT', 1))
+# 스트림별 (프레임 시퀀스 번호, 썸네일 태스크). 새 프레임이 올 때까지
+# 같은 썸네일을 재사용한다.
+THUMBNAILS = weakref.WeakKeyDictionary()
+
+
+def vision(request, camera_id):
+    return render(request, 'vision/vision.html', {'camera_id': camera_id})
+
+
+def overlay(request, camera_id):
+    context = {
+        'camera_id': camera_id,
+        'colors': [hex2rgb(c[500]) for c in ALL_COLORS],
+        'limbs': [(i, j) for i, js in POSE_SCHEMA.items() for j in js],
+    }
+    return render(request, 'vision/overlay.html', context)
+
+
+def _parse_fps(request):
+    fps = float(request.GET.get(
+        'fps', getattr(settings, 'VISION_MAX_FPS', None) or 0))
+    if not 0 <= fps < float('inf'):
+        raise ValueError(fps)
+    return fps
+
+
+def _quality_controller(request):
+    adaptive = request.GET.get(
+        'adaptive', getattr(settings, 'VISION_ADAPTIVE_QUALITY', True))
+    adaptive = adaptive not in (False, '0', 'false')
+    tiers = getattr(settings, 'VISION_QUALITY_TIERS', TIERS)
+    return QualityController(tiers if adaptive else tiers[:1])
+
+
+def _decoder(camera_id):
+    # 프로세스 풀에서만 FrameRing으로 디코딩 결과를 공유한다. 스레드
+    # 풀은 디코딩을 렌더 태스크마다 한다.
+    options = getattr(settings, 'VISION_FRAME_RING', {})
+    if POOL.kind != 'process' or options is None:
+        return None
+    options = {
+        **options,
+        **getattr(settings, 'VISION_FRAME_RINGS', {}).get(camera_id, {})}
+    return partial(
+        decode_stream, pool=POOL,
+        codec=getattr(settings, 'VISION_JPEG_CODEC', 'auto'), **options)
+
+
+async def _generate_image(name, key, renderer, controller, fps):
+    min_interval = 1 / fps if fps else 0.0
+    try:
+        stream = STREAMS.get(name)
+        metrics = stream.metrics
+        previous = None
+        while True:
+            # 같은 화질 단계의 시청자들은 렌더 결과를 공유한다.
+            quality, scale = controller.tier
+            async with stream.subscribe(
+                    (*key, quality, scale),
+                    partial(renderer, quality=quality, scale=scale)
+                    ) as output:
+                seq = 0
+                while True:
+                    # 밀린 청크는 쌓이지 않고 최신 청크로 덮어쓰인다.
+                    seq, chunk = await output.wait(seq)
+                    # 서버가 청크를 다 보내야 다음 청크를 요청한다.
+                    # (Daphne는 BackpressureMiddleware가 기다리게 한다.)
+                    started_at = time.perf_counter()
+                    yield chunk.data
+                    drain = time.perf_counter() - started_at
+                    # 내보내는 동안 도착한 청크 중 최신 하나만 보낸다.
+                    skipped = max(0, output.seq - seq - 1)
+                    metrics.frames_skipped['send'] += skipped
+                    metrics.observe('send', drain)
+                    metrics.latency['send'].record(
+                        time.time() - chunk.timestamp)
+                    metrics.bytes_sent += len(chunk.data)
+
+                    interval = None
+                    if previous is not None and chunk.seq > previous.seq:
+                        interval = max(
+                            min_interval,
+                            (chunk.timestamp - previous.timestamp)
+                            / (chunk.seq - previous.seq))
+                    previous = chunk
+                    if controller.update(drain, interval, skipped):
+                        break
+                    # 최대 fps를 넘지 않도록 기다린다. 그 사이 도착한
+                    # 청크는 건너뛴다.
+                    delay = started_at + min_interval - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+    except Exception:
+        traceback.print_exc()
+
+
+async def stream(request, camera_id):
+    mode = request.GET.get('mode', 'side')
+    if mode not in MODES:
+        return HttpResponseBadRequest(f'mode must be one of {MODES}.')
+    try:
+        fps = _parse_fps(request)
+    except ValueError:
+        return HttpResponseBadRequest('fps must be a non-negative number.')
+    renderer = partial(
+        render_stream, mode=mode, pool=POOL,
+        timestamps=getattr(settings, 'VISION_PART_TIMESTAMPS', False),
+        codec=getattr(settings, 'VISION_JPEG_CODEC', 'auto'),
+        decoder=_decoder(camera_id))
 
     return StreamingHttpResponse(
-        generate_image(),
+        _generate_image(
+            camera_id, (mode,), renderer, _quality_controller(request), fps),
         content_type="multipart/x-mixed-replace; boundary=frame"
     )
 
 
-# --- HARDCODE ---
-COLORS = color = [hex2bgr(c[500]) for c in ALL_COLORS]
-POSE_SCHEMA = {
-    0: [1, 2,], 1: [3,], 2: [4,], 3: [], 4: [],
-    5: [6, 7, 11,], 6: [8, 12,], 7: [9,], 8: [10,], 9: [],
-    10: [], 11: [12, 13,], 12: [14,], 13: [15,], 14: [16,],
-    15: [], 16: []}
-REDZONE = np.array(
-    [(10, 10), (20, 350), (300, 340), (240, 20)], dtype=int
-).reshape(1, -1, 2)
-REDZONE_MASK = np.zeros(
-    shape=(360, 640),
-    dtype=np.uint8)
-cv2.fillPoly(REDZONE_MASK, [REDZONE], 255)
-MANAGER = TimerManager()
-# ----------------
-
-
-def plot(
-        frame: np.ndarray,
-        preds: Dict[str, Any],
-        bbox_conf_thres: float = 0.5,
-        kpts_conf_thres: float = 0.5,
-    ) -> np.ndarray:
-
-    boxes = np.array(preds['boxes'], dtype=np.float32)
-    kptss = np.array(preds['kptss'], dtype=np.float32)
-    frame_hpe = np.copy(frame)
-    if boxes.size != 0:
-        for bbox, kpts in zip(boxes, kptss):
-            bbox_id, bbox_conf = int(bbox[4]), bbox[5]
-            if bbox_conf < bbox_conf_thres:
-                continue
-            color_id = bbox_id % len(COLORS)
-            label = f'Person {bbox_conf:.3f}'
-            plot_bounding_box(
-                frame_hpe, bbox[:4], COLORS[color_id], label=label)
-            plot_keypoints(
-                frame_hpe, kpts, COLORS[color_id], POSE_SCHEMA, kpts_conf_thres)
-
-    frame_ids = np.copy(frame)
-    cv2.polylines(frame_ids, [REDZONE], True, (0, 0, 255), 2)
-    if boxes.size != 0:
-        # --- DIRTY CODE ---
-        # boxes shape is (n, 7)
-        # box in boxes is (x_min, y_min, x_max, y_max, box_id, conf, class_id)
-        boxes = boxes[boxes[:, 5] >= bbox_conf_thres]
-        boxes_xyxy = boxes[:, :4].astype(int)
-        boxes_cxcy = np.empty(shape=(len(boxes), 2), dtype=int)
-        boxes_cxcy[:, 0] = (boxes_xyxy[:, 0] + boxes_xyxy[:, 2]) >> 1  # = int((x1 + x2) / 2)
-        boxes_cxcy[:, 1] = (boxes_xyxy[:, 1] + boxes_xyxy[:, 3]) >> 1  # = int((y1 + y2) / 2)
-        # dtype of redzone_mask is uint8, ndim is 2, value is either 0 or 255.
-        boxes = boxes[REDZONE_MASK[boxes_cxcy[:, 1], boxes_cxcy[:, 0]] == 255]
-        # --- ---
-        boxes_ids = boxes[:, 4].astype(int)
-        MANAGER.syncronize(boxes_ids)
-        for bbox in boxes:
-            bbox_id, bbox_conf = int(bbox[4]), bbox[5]
-            xyxy = bbox[:4].astype(int)
-            bbox_name = 'Person'
-            bbox_conf = f'{bbox_conf:.3f}'
-            bbox_time = MANAGER.timers[bbox_id].get_elapsed_time()
-            label = f'{bbox_name} {bbox_conf} {bbox_time}'
-            color_id = bbox_id % len(COLORS)
-            plot_bounding_box(
-                frame_ids, xyxy, COLORS[color_id], label=label)
-
-    return np.hstack([frame_hpe, frame_ids])
+async def mosaic(request):
+    camera_ids = [c for c in request.GET.get('cameras', '').split(',') if c]
+    max_tiles = getattr(settings, 'VISION_MOSAIC_MAX_TILES', 16)
+    if not 0 < len(camera_ids) <= max_tiles:
+        return HttpResponseBadRequest(
+            f'cameras must list 1 to {max_tiles} comma-separated camera ids.')
+    mode = request.GET.get('mode', 'raw')
+    if mode not in MODES:
+        return HttpResponseBadRequest(f'mode must be one of {MODES}.')
+    try:
+        cols = int(request.GET.get('cols', 0)) or None
+        if cols is not None and cols < 1:
+            raise ValueError(cols)
+    except ValueError:
+        return HttpResponseBadRequest('cols must be a positive integer.')
+    try:
+        fps = _parse_fps(request)
+    except ValueError:
+        return HttpResponseBadRequest('fps must be a non-negative number.')
+
+    def renderer(stream, output, quality, scale):
+        # 소스 스트림은 렌더 태스크가 시작될 때 조회한다.
+        sources = [STREAMS.get(camera_id) for camera_id in camera_ids]
+        return render_mosaic(
+            stream, output, sources, mode=mode, cols=cols,
+            tile_size=getattr(settings, 'VISION_MOSAIC_TILE', (640, 360)),
+            fps=getattr(settings, 'VISION_MOSAIC_FPS', 10.0), pool=POOL,
+            timestamps=getattr(settings, 'VISION_PART_TIMESTAMPS', False),
+            quality=quality, scale=scale,
+            codec=getattr(settings, 'VISION_JPEG_CODEC', 'auto'))
+
+    return StreamingHttpResponse(
+        _generate_image(
+            f'mosaic:{",".join(camera_ids)}', (mode, cols), renderer,
+            _quality_controller(request), fps),
+        content_type="multipart/x-mixed-replace; boundary=frame"
+    )
+
+
+def _latest_frame(camera_id):
+    # 폴링으로 스트림이 새로 만들어지지 않도록 get() 전에 확인한다. 단,
+    # 다른 워커가 수신하는 카메라일 수 있으므로 버스를 공유할 때는
+    # 스트림을 만들어 프레임을 받아오고, 폴링하는 동안 정리되지 않게
+    # 한다.
+    is_shared = STREAMS.bus is not None and STREAMS.bus.is_shared
+    if camera_id not in STREAMS and not is_shared:
+        raise Http404(f'No stream named {camera_id!r}.')
+    stream = STREAMS.get(camera_id)
+    if is_shared:
+        stream.last_active = time.monotonic()
+    if stream.frames.value is None:
+        raise Http404(f'{camera_id!r} has not received a frame yet.')
+    return stream, stream.frames.value
+
+
+def _snapshot_etag(request, camera_id):
+    try:
+        _, frame = _latest_frame(camera_id)
+    except Http404:
+        return None
+    return f'{frame.seq}-{frame.timestamp:.6f}'
+
+
+async def _thumbnail(stream, frame):
+    seq, task = THUMBNAILS.get(stream, (None, None))
+    if seq != stream.frames.seq:
+        task = asyncio.ensure_future(POOL.run(
+            stream, render_thumbnail, frame.image,
+            (frame.width, frame.height),
+            getattr(settings, 'VISION_THUMBNAIL_WIDTH', 320),
+            getattr(settings, 'VISION_JPEG_CODEC', 'auto')))
+        THUMBNAILS[stream] = stream.frames.seq, task
+    # 요청이 취소되어도 다른 요청이 기다리는 썸네일은 계속 만든다.
+    return await asyncio.shield(task)
+
+
+@condition(etag_func=_snapshot_etag)
+async def snapshot(request, camera_id):
+    stream, frame = _latest_frame(camera_id)
+    if request.GET.get('thumb') in ('1', 'true'):
+        jpeg = await _thumbnail(stream, frame)
+    else:
+        # 수신된 JPEG을 그대로 보낸다.
+        jpeg = frame.image.data
+    response = HttpResponse(jpeg, content_type='image/jpeg')
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+async def metrics(request):
+    # 지표는 이벤트 루프에서만 갱신되므로, 루프에서 읽는다.
+    return HttpResponse(
+        exposition(STREAMS),
+        content_type='text/plain; version=0.0.4; charset=utf-8')
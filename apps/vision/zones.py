@@ -0,0 +1,90 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, Optional
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Camera, Zone
+from .src.zones import ZoneMask
+
+
+class ZoneCache():
+
+    """
+    카메라별 ZoneMask 캐시. get()은 캐시된 마스크를 즉시 반환하며,
+    캐시가 오래되었으면 백그라운드에서 DB를 다시 조회한다. 존 정의가
+    실제로 바뀐 경우에만 ZoneMask를 새로 만든다. 같은 프로세스에서
+    존이 수정되면 signal로 즉시 무효화되며, 다른 프로세스에서의 수정은
+    refresh_interval 이내에 반영된다.
+
+    캐시는 스트림과 함께 정리된다. 스트림이 정리될 때 evict()가
+    호출되므로, 임의의 camera_id로 연결해도 캐시가 계속 늘지 않는다.
+
+    Args:
+        - refresh_interval: DB 재조회 간격. (초)
+    """
+
+    def __init__(self, refresh_interval: float = 5.0) -> None:
+        self._refresh_interval = refresh_interval
+        self._masks: Dict[str, ZoneMask] = {}
+        self._fingerprints: Dict[str, str] = {}
+        self._loaded_at: Dict[str, float] = {}
+        self._loading: Dict[str, asyncio.Task] = {}
+
+    def get(self, camera_id: str) -> Optional[ZoneMask]:
+        loaded_at = self._loaded_at.get(camera_id)
+        is_stale = (loaded_at is None
+                    or time.monotonic() - loaded_at > self._refresh_interval)
+        if is_stale and camera_id not in self._loading:
+            self._loading[camera_id] = asyncio.create_task(
+                self._reload(camera_id))
+        return self._masks.get(camera_id)
+
+    def invalidate(self) -> None:
+        self._loaded_at.clear()
+
+    def evict(self, camera_id: str) -> None:
+        loading = self._loading.get(camera_id)
+        if loading is not None:
+            loading.cancel()
+        self._masks.pop(camera_id, None)
+        self._fingerprints.pop(camera_id, None)
+        self._loaded_at.pop(camera_id, None)
+
+    async def _reload(self, camera_id: str) -> None:
+        try:
+            zones = await database_sync_to_async(self._fetch)(camera_id)
+            if len(zones) > ZoneMask.MAX_ZONES:
+                logging.warning(
+                    f'{camera_id}: only the first {ZoneMask.MAX_ZONES}'
+                    f' of {len(zones)} zones are used.')
+                zones = zones[:ZoneMask.MAX_ZONES]
+            fingerprint = json.dumps(zones)
+            if fingerprint != self._fingerprints.get(camera_id):
+                self._masks[camera_id] = ZoneMask(zones)
+                self._fingerprints[camera_id] = fingerprint
+            self._loaded_at[camera_id] = time.monotonic()
+        except Exception:
+            logging.exception(f'{camera_id}: failed to load zones.')
+            self._loaded_at[camera_id] = time.monotonic()
+        finally:
+            del self._loading[camera_id]
+
+    @staticmethod
+    def _fetch(camera_id: str):
+        zones = Zone.objects.filter(camera__camera_id=camera_id)
+        return [[zone.pk, zone.points] for zone in zones]
+
+
+ZONES = ZoneCache(getattr(settings, 'VISION_ZONE_REFRESH', 5.0))
+
+
+@receiver([post_save, post_delete], sender=Zone)
+@receiver([post_save, post_delete], sender=Camera)
+def invalidate_zones(sender, **kwargs):
+    ZONES.invalidate()
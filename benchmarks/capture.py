@@ -0,0 +1,80 @@
+"""
+25 fps 동영상을 CaptureThread로 읽을 때 넘기는 프레임 수(fps)에 따른
+캡처 스레드의 CPU 시간을 측정합니다.
+
+    $ python -m benchmarks.capture
+
+all 은 모든 프레임을 넘기는 경우(fps=None), 5 fps 는 다섯 프레임 중
+하나만 retrieve()/resize 하여 넘기는 경우입니다. grab 은 첫 프레임
+이후로 넘기지 않는 경우로, grab() 만 하는 하한에 가깝습니다. grab()
+에서 일어나는 디코딩은 어느 경우든 줄지 않습니다. 넘겨받는 쪽은
+프레임 수만 셉니다.
+
+CaptureThread는 파일을 원본 fps에 맞춰 읽으므로, 잡은 프레임 수는
+경과 시간 * 25로 셉니다. 동영상은 임시 디렉터리에 만들어집니다.
+(1280x720, mp4v)
+"""
+
+
+import os
+import tempfile
+import time
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from apps.vision.src.capture import CaptureThread
+
+
+def make_video(path: str, n_frames: int = 250, fps: int = 25) -> None:
+    rng = np.random.default_rng(0)
+    background = cv2.GaussianBlur(
+        rng.integers(0, 256, size=(720, 1280, 3), dtype=np.uint8),
+        (31, 31), 0)
+    writer = cv2.VideoWriter(
+        path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (1280, 720))
+    for i in range(n_frames):
+        frame = np.roll(background, i * 8, axis=1)
+        writer.write(frame)
+    writer.release()
+
+
+def measure(
+        path: str,
+        fps: Optional[float],
+        seconds: float = 5.0,
+        source_fps: int = 25
+    ) -> Tuple[float, int]:
+
+    delivered = 0
+
+    def on_frame(frame, timestamp):
+        nonlocal delivered
+        delivered += 1
+
+    thread = CaptureThread(path, on_frame, (640, 360), fps)
+    start_cpu, start = time.process_time(), time.monotonic()
+    thread.start()
+    time.sleep(seconds)
+    thread.stop()
+    thread.join()
+    n_frames = (time.monotonic() - start) * source_fps
+    return (time.process_time() - start_cpu) / n_frames, delivered
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'clip.mp4')
+        make_video(path)
+        results = [
+            ('all', *measure(path, None)),
+            ('5 fps', *measure(path, 5)),
+            ('grab', *measure(path, 1e-3))]
+    print(f'{"":>10} {"CPU per frame (ms)":>20} {"delivered":>10}')
+    for name, cpu, delivered in results:
+        print(f'{name:>10} {cpu * 1e3:>20.2f} {delivered:>10}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+640x360 프레임에서 JPEG 코덱별 디코딩/인코딩 시간을 측정합니다.
+
+    $ python -m benchmarks.codec
+
+decode 1/2, 1/4 는 축소 디코딩이며, resize 는 전체 해상도로 디코딩한
+뒤 cv2.resize()로 줄이는 방식입니다. encode side 는 side 모드의
+1280x360 출력입니다. 설치되지 않은 코덱은 건너뜁니다.
+"""
+
+
+import time
+
+import cv2
+import numpy as np
+
+from apps.vision.src.codec import CODECS, get_codec
+from apps.vision.src.envelope import unpack
+from benchmarks.fanout import make_payload
+
+
+def measure(fn, *args, repeat: int = 200) -> float:
+    fn(*args)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(*args)
+    return (time.perf_counter() - start) / repeat
+
+
+def decode_resize(codec, jpeg, reduce):
+    img = codec.decode(jpeg)
+    height, width = img.shape[:2]
+    return cv2.resize(
+        img, (width // reduce, height // reduce),
+        interpolation=cv2.INTER_AREA)
+
+
+def main():
+    jpeg = unpack(make_payload()).image
+    frame = cv2.imdecode(jpeg, cv2.IMREAD_COLOR)
+    side = np.hstack([frame, frame])
+
+    cases = [
+        ('decode', lambda c: measure(c.decode, jpeg)),
+        ('decode 1/2', lambda c: measure(c.decode, jpeg, 2)),
+        ('decode 1/4', lambda c: measure(c.decode, jpeg, 4)),
+        ('resize 1/4', lambda c: measure(decode_resize, c, jpeg, 4)),
+        ('encode', lambda c: measure(c.encode, frame)),
+        ('encode side', lambda c: measure(c.encode, side)),
+    ]
+
+    codecs = []
+    for name in CODECS:
+        try:
+            codecs.append(get_codec(name))
+        except (RuntimeError, OSError) as e:
+            print(f'{name}: not available. {str(e).splitlines()[0]}')
+
+    print(f'{"":>12}' + ''.join(f'{c.name + " (ms)":>16}' for c in codecs))
+    for label, run in cases:
+        print(f'{label:>12}'
+              + ''.join(f'{run(c) * 1e3:>16.3f}' for c in codecs))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+시청자 수에 따른 프레임당 CPU 시간을 측정합니다.
+
+    $ python -m benchmarks.fanout
+
+shared 는 스트림당 렌더 태스크 하나가 인코딩한 청크를 모든 시청자가
+공유하는 방식이며, per-viewer 는 시청자마다 디코딩/플로팅/인코딩을
+따로 수행하는 이전 방식입니다.
+"""
+
+
+import asyncio
+import time
+
+import cv2
+import numpy as np
+
+from apps.vision.src.envelope import pack, unpack
+from apps.vision.src.render import annotate, render_chunk, render_stream
+from apps.vision.src.stream import Stream
+
+
+def make_payload(n_people: int = 5, seed: int = 0) -> bytes:
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(0, 256, size=(360, 640, 3), dtype=np.uint8)
+    frame = cv2.GaussianBlur(frame, (15, 15), 0)
+    _, jpeg = cv2.imencode('.jpeg', frame)
+
+    xy = rng.uniform((0, 0), (560, 280), size=(n_people, 2))
+    wh = rng.uniform((40, 60), (80, 80), size=(n_people, 2))
+    boxes = np.concatenate([
+        xy, xy + wh,
+        np.arange(n_people)[:, None],
+        rng.uniform(0.5, 1.0, size=(n_people, 1)),
+        np.zeros((n_people, 1))], axis=1)
+    kptss = np.concatenate([
+        xy[:, None] + rng.uniform(0, 1, size=(n_people, 17, 2)) * wh[:, None],
+        rng.uniform(0.0, 1.0, size=(n_people, 17, 1))], axis=2)
+    return pack(jpeg, boxes, kptss, 'bench', time.time(), 0, 640, 360)
+
+
+async def run(n_viewers: int, n_frames: int, shared: bool) -> float:
+    stream = Stream('bench')
+    payload = unpack(make_payload())
+    received = 0
+    done = asyncio.Event()
+
+    async def viewer():
+        nonlocal received
+        if shared:
+            async with stream.subscribe('default', render_stream) as output:
+                seq = 0
+                while True:
+                    seq, _ = await output.wait(seq)
+                    received += 1
+                    if received == n_viewers:
+                        done.set()
+        else:
+            seq = 0
+            while True:
+                seq, frame = await stream.frames.wait(seq)
+                render_chunk(frame.image, annotate(frame), 'side')
+                received += 1
+                if received == n_viewers:
+                    done.set()
+
+    tasks = [asyncio.create_task(viewer()) for _ in range(n_viewers)]
+    await asyncio.sleep(0)
+
+    start = time.process_time()
+    for _ in range(n_frames):
+        received = 0
+        done.clear()
+        stream.publish(payload)
+        await done.wait()
+    elapsed = time.process_time() - start
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return elapsed / n_frames
+
+
+def main():
+    n_frames = 30
+    print(f'{"viewers":>8} {"shared (ms/frame)":>18} {"per-viewer (ms/frame)":>22}')
+    for n_viewers in (1, 10, 50):
+        shared = asyncio.run(run(n_viewers, n_frames, shared=True))
+        legacy = asyncio.run(run(n_viewers, n_frames, shared=False))
+        print(f'{n_viewers:>8} {shared * 1e3:>18.2f} {legacy * 1e3:>22.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+사람 수에 따른 바운딩 박스/키포인트 렌더링 시간을 측정합니다.
+
+    $ python -m benchmarks.plotting
+
+loop 는 사람마다 plot_bounding_box()와 plot_keypoints()를 호출하는
+이전 방식이며, batch 는 plot_bounding_boxes()와 plot_skeletons()로
+모든 사람을 한 번에 그리는 방식입니다. batch 는 사람별이 아니라
+색상별로 그리므로, 사람들이 겹치는 곳의 픽셀은 loop 와 다를 수
+있습니다.
+"""
+
+
+import time
+
+import numpy as np
+
+from apps.vision.src.plotting import (
+    plot_bounding_box, plot_bounding_boxes, plot_keypoints, plot_skeletons)
+from apps.vision.src.render import COLORS, POSE_LIMBS, POSE_SCHEMA
+
+
+def make_people(n_people: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    xy = rng.uniform((0, 0), (560, 280), size=(n_people, 2))
+    wh = rng.uniform((40, 60), (80, 80), size=(n_people, 2))
+    boxes = np.concatenate([
+        xy, xy + wh,
+        np.arange(n_people)[:, None],
+        rng.uniform(0.5, 1.0, size=(n_people, 1)),
+        np.zeros((n_people, 1))], axis=1).astype(np.float32)
+    kptss = np.concatenate([
+        xy[:, None] + rng.uniform(0, 1, size=(n_people, 17, 2)) * wh[:, None],
+        rng.uniform(0.0, 1.0, size=(n_people, 17, 1))], axis=2)
+    return boxes, kptss.astype(np.float32)
+
+
+def plot_loop(img, boxes, kptss):
+    for bbox, kpts in zip(boxes, kptss):
+        color = COLORS[int(bbox[4]) % len(COLORS)]
+        plot_bounding_box(img, bbox[:4], color, label=f'Person {bbox[5]:.3f}')
+        plot_keypoints(img, kpts, color, POSE_SCHEMA)
+
+
+def plot_batch(img, boxes, kptss):
+    color_ids = boxes[:, 4].astype(int) % len(COLORS)
+    labels = [f'Person {conf:.3f}' for conf in boxes[:, 5]]
+    plot_skeletons(img, kptss, color_ids, COLORS, POSE_LIMBS)
+    plot_bounding_boxes(img, boxes[:, :4], color_ids, COLORS, labels=labels)
+
+
+def measure(fn, boxes, kptss, repeat: int = 200) -> float:
+    img = np.zeros((360, 640, 3), dtype=np.uint8)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(img, boxes, kptss)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    print(f'{"people":>7} {"loop (ms)":>10} {"batch (ms)":>11} {"speedup":>8}')
+    for n_people in (1, 20, 100):
+        boxes, kptss = make_people(n_people)
+        loop = measure(plot_loop, boxes, kptss)
+        batch = measure(plot_batch, boxes, kptss)
+        print(f'{n_people:>7} {loop * 1e3:>10.3f} {batch * 1e3:>11.3f}'
+              f' {loop / batch:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
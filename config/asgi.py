@@ -1,18 +1,23 @@
 import os
 
 from django.core.asgi import get_asgi_application
-from channels.auth import AuthMiddlewareStack
-from channels.routing import ProtocolTypeRouter, URLRouter
-
-import apps.vision.routing as routing
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Set up Django before importing anything that touches models or settings.
+django_asgi_app = get_asgi_application()
+
+from channels.auth import AuthMiddlewareStack  # noqa: E402
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+
+import apps.vision.routing as routing  # noqa: E402
+from apps.vision.backpressure import BackpressureMiddleware  # noqa: E402
+from apps.vision.capture import CaptureMiddleware  # noqa: E402
 
-application = ProtocolTypeRouter({
-  "http": get_asgi_application(),
+application = CaptureMiddleware(ProtocolTypeRouter({
+  "http": BackpressureMiddleware(django_asgi_app),
   "websocket": AuthMiddlewareStack(
         URLRouter(
             routing.websocket_urlpatterns
         )
     ),
-})
\ No newline at end of file
+}))
@@ -125,3 +125,80 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Vision
+
+# CPU-bound rendering (decode, plot, encode) runs off the event loop.
+# 'thread' or 'process'. OpenCV releases the GIL, so threads scale too.
+VISION_RENDER_EXECUTOR = 'thread'
+VISION_RENDER_WORKERS = None  # None: os.cpu_count()
+# Maximum number of frames of one stream being rendered at once.
+VISION_RENDER_MAX_INFLIGHT = 1
+# Seconds between reloads of the zones of a camera from the database.
+VISION_ZONE_REFRESH = 5.0
+# Seconds a track may be missing before its dwell timer is reset.
+VISION_DWELL_GRACE_PERIOD = 1.0
+# Streams without connections or frames for this many seconds are
+# dropped together with their dwell timers.
+VISION_STREAM_IDLE_TIMEOUT = 300.0
+# Zone enter/exit events are written to the database in batches of up
+# to this many events, at most this many seconds after they happen.
+VISION_EVENT_BATCH_SIZE = 500
+VISION_EVENT_FLUSH_INTERVAL = 1.0
+# Events beyond this many waiting to be written are dropped, oldest first.
+VISION_EVENT_MAX_PENDING = 100000
+# Stamp each MJPEG part with the capture time of its frame as an
+# 'X-Timestamp' header (unix time in seconds).
+VISION_PART_TIMESTAMPS = False
+# Step each MJPEG viewer down through these (JPEG quality, scale) tiers
+# when it drains slower than frames arrive, and back up once it keeps up.
+# Viewers can opt out with '?adaptive=0'.
+VISION_ADAPTIVE_QUALITY = True
+VISION_QUALITY_TIERS = ((None, 1.0), (75, 1.0), (60, 0.75), (50, 0.5))
+# Default cap on the frame rate sent to each MJPEG viewer. None: no cap.
+# Viewers can set their own with '?fps=N'.
+VISION_MAX_FPS = None
+# JPEG codec: 'auto' (libjpeg-turbo through PyTurboJPEG when installed,
+# otherwise OpenCV), 'turbojpeg' or 'opencv'.
+VISION_JPEG_CODEC = 'auto'
+# Mosaic ('/vision/mosaic/?cameras=a,b,c'): tiles per mosaic, size of one
+# tile (width, height), and how often the grid is re-encoded at most.
+VISION_MOSAIC_MAX_TILES = 16
+VISION_MOSAIC_TILE = (640, 360)
+VISION_MOSAIC_FPS = 10.0
+# Maximum width of '/vision/<camera_id>/snapshot.jpg?thumb=1'.
+VISION_THUMBNAIL_WIDTH = 320
+# How frames received by one worker reach viewers on other workers:
+# 'local' (single process), 'shm' (workers on the same host, through
+# shared memory) or 'redis' (pip install redis). The options are passed
+# to the bus, e.g. {'url': 'redis://localhost:6379/0'} for 'redis' or
+# {'slot_size': 1 << 20} for 'shm'.
+VISION_FRAME_BUS = 'local'
+VISION_FRAME_BUS_OPTIONS = {}
+# With the 'process' executor, each frame is decoded once into a
+# per-camera shared-memory ring that the render processes of every mode
+# read without copying, instead of being decoded again for each mode.
+# 'n_slots' frames are kept; 'shape' (height, width, 3) allocates the
+# ring up front instead of on the first frame. None disables the ring.
+VISION_FRAME_RING = {'n_slots': 4}
+# Per-camera overrides of VISION_FRAME_RING, by camera id.
+# e.g. {'lobby': {'n_slots': 8, 'shape': (1080, 1920, 3)}}
+VISION_FRAME_RINGS = {}
+# Cameras with a 'source' (RTSP URL or video file) are captured on the
+# server, once per camera, from server startup (ASGI lifespan; with
+# Daphne, from the first connection) whether or not anyone is watching,
+# so zone events are recorded for every such camera. Sources are
+# reloaded every VISION_CAPTURE_REFRESH seconds. With a shared
+# VISION_FRAME_BUS, run 'python manage.py capture' instead.
+# Frames are resized to VISION_CAPTURE_SIZE (width, height) when set, and
+# failed sources are reopened after a delay that doubles from
+# VISION_CAPTURE_MIN_BACKOFF up to VISION_CAPTURE_MAX_BACKOFF seconds.
+VISION_CAPTURE_SIZE = None
+# Deliver at most this many captured frames per second. Every frame is
+# still grabbed to keep the decoder in sync, but only delivered ones are
+# converted to BGR and resized. None: every frame.
+VISION_CAPTURE_FPS = None
+VISION_CAPTURE_MIN_BACKOFF = 1.0
+VISION_CAPTURE_MAX_BACKOFF = 30.0
+VISION_CAPTURE_REFRESH = 5.0
@@ -1,4 +1,5 @@
 import sys
+import time
 import traceback
 from pathlib import Path
 from typing import Dict
@@ -10,7 +11,8 @@ from ultralytics import YOLO
 
 sys.path.append(str(Path(__file__).absolute().parents[1]))
 from lib.pose import DEAFAULT_SCHEMA
-from utils.video import FrameCapture, FrameSkipper
+from utils.video import FrameCapture
+from utils.schedule import InferenceScheduler
 from utils.color import ALL_COLORS, hex2bgr
 from utils.plotting import plot_bounding_box, plot_keypoints
 
@@ -70,15 +72,16 @@ def to_http_multipart(jpeg: bytes):
 
 
 app = flask.Flask(__name__)
+# 이 프로세스의 모든 스트림이 추론 예산을 나눠 씁니다.
+scheduler = InferenceScheduler(budget=1.0, max_latency=1.0)
 
 
 def main():
     video_source = 'rtsp://192.168.1.101:554/profile2/media.smp'
     target_size = (640, 360)
-    skip_interval = 3
 
     model = YOLO('yolov8n-pose.pt')
-    skipper = FrameSkipper(skip_interval)
+    camera = scheduler.register(video_source)
     names = model.names
 
     try:
@@ -87,11 +90,14 @@ def main():
             for frame in cap:
                 frame = cv2.resize(frame, target_size)
 
-                if not skipper.is_skip():
+                if camera.should_infer(frame):
+                    started_at = time.perf_counter()
                     # TODO: tracking.
                     preds = model.track(frame,
                                         persist=True,
                                         verbose=False)
+                    camera.report(time.perf_counter() - started_at,
+                                  len(preds[0].boxes))
                     # TODO: non-tracking.
                     #preds = model.predict(frame,
                     #                      verbose=False)
@@ -112,6 +118,8 @@ def main():
 
     except:
         traceback.print_exc()
+    finally:
+        camera.close()
 
 
 @app.route('/video')
@@ -11,7 +11,8 @@ from ultralytics import YOLO
 
 sys.path.append(str(Path(__file__).absolute().parents[1]))
 from lib.timer import TimerManager
-from utils.video import FrameCapture, FrameSkipper
+from utils.video import FrameCapture
+from utils.schedule import InferenceScheduler
 from utils.color import ALL_COLORS, hex2bgr
 from utils.plotting import plot_bounding_box
 
@@ -79,19 +80,20 @@ def to_http_multipart(jpeg: bytes):
 
 
 app = flask.Flask(__name__)
+# 이 프로세스의 모든 스트림이 추론 예산을 나눠 씁니다.
+scheduler = InferenceScheduler(budget=1.0, max_latency=1.0)
 
 
 def main():
     video_source = 'rtsp://192.168.1.101:554/profile2/media.smp'
     target_size = (640, 360)
-    skip_interval = 3
     redzone = ((10, 10),
                (20, 350),
                (300, 340),
                (240, 20))
 
     model = YOLO('yolov8n.pt')
-    skipper = FrameSkipper(skip_interval)
+    camera = scheduler.register(video_source)
     manager = TimerManager()
     names = model.names
 
@@ -111,12 +113,15 @@ def main():
                               (0, 0, 255),
                               2)
 
-                if not skipper.is_skip():
+                if camera.should_infer(frame):
+                    started_at = time.perf_counter()
                     # TODO: only possible tracking mode.
                     preds = model.track(frame,
                                         persist=True,
                                         verbose=False,
                                         classes=[0],)
+                    camera.report(time.perf_counter() - started_at,
+                                  len(preds[0].boxes))
 
                 if not preds is None:
                     results = preds[0]
@@ -134,6 +139,8 @@ def main():
 
     except:
         traceback.print_exc()
+    finally:
+        camera.close()
 
 
 @app.route('/video')
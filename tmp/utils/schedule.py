@@ -0,0 +1,242 @@
+"""
+여러 카메라가 하나의 추론 예산을 나눠 쓰도록, 추론할 프레임을 고르는
+스케줄러를 모아 두었습니다. StepSkipper처럼 N번째 프레임마다 추론하는
+대신, 측정된 모델 실행 시간과 장면의 활동량(움직임, 트랙 수)을 보고
+추론 간격을 정합니다.
+
+[Functions]
+
+    motion_ratio(prev, curr, threshold) -> float
+        축소된 두 그레이스케일 이미지 사이에서 밝기가 threshold보다
+        크게 변한 픽셀의 비율을 반환합니다.
+
+[Classes]
+
+    InferenceScheduler
+        노드의 추론 예산(초당 모델 실행 시간)을 카메라들의 활동량에
+        비례하여 나누고, 카메라별 추론 간격을 정합니다.
+
+    CameraSchedule
+        카메라 하나의 스케줄 상태. 프레임마다 추론 여부를 결정하고,
+        측정된 모델 실행 시간과 트랙 수를 보고받습니다.
+"""
+
+
+import threading
+import time
+from typing import Optional, Set, Tuple
+
+import cv2
+import numpy as np
+
+
+def motion_ratio(
+        prev: np.ndarray,
+        curr: np.ndarray,
+        threshold: int = 15
+    ) -> float:
+
+    diff = cv2.absdiff(prev, curr)
+    return cv2.countNonZero(cv2.threshold(
+        diff, threshold, 255, cv2.THRESH_BINARY)[1]) / diff.size
+
+
+class InferenceScheduler():
+
+    """ 노드의 모든 카메라가 하나의 추론 예산을 나눠 쓰도록, 카메라별
+        추론 간격을 정합니다.
+
+        예산(budget)은 1초 동안 모델 실행에 쓸 수 있는 시간(초)입니다.
+        예를 들어 추론에 코어 두 개를 내어 줄 수 있다면 2.0, 코어 하나
+        의 절반이라면 0.5입니다. 각 카메라에는 활동량에 비례하는 가중치
+
+        >>> weight = 1 + motion_gain * motion + track_gain * n_tracks
+
+        가 매겨지며, 카메라의 초당 추론 횟수는 가중치에 비례하되 모든
+        카메라의 (초당 추론 횟수 * 모델 실행 시간)의 합이 예산과 같아
+        지도록 정해집니다.
+
+        >>> demand = sum(c.weight * c.cost for c in cameras)
+        >>> interval = demand / (budget * camera.weight)
+
+        결과적으로 움직임이 많거나 사람이 많은 카메라는 자주, 정적인
+        장면의 카메라는 드물게 추론하며, 카메라가 늘어나거나 모델이
+        느려지면 모든 카메라의 간격이 함께 늘어납니다. 간격은 min_
+        interval보다 짧아지지 않고, max_latency보다 길어지지 않습니다.
+        max_latency는 추론 결과가 낡아도 되는 최대 시간(지연 예산)
+        으로, 예산보다 우선합니다. 예산이 부족하여 모든 카메라가 max_
+        latency로 추론하게 되면, 실제 사용량은 예산을 넘을 수 있습니다.
+
+        예산은 같은 프로세스의 스케줄러 하나를 공유하는 카메라들이 나눠
+        씁니다. (스레드 안전) 카메라마다 프로세스를 띄운다면 프로세스
+        마다 예산을 나누어 주어야 합니다.
+
+        >>> scheduler = InferenceScheduler(budget=1.0, max_latency=1.0)
+        >>> camera = scheduler.register('cam0')
+        >>> for frame in cap:
+        >>>     if camera.should_infer(frame):
+        >>>         started_at = time.perf_counter()
+        >>>         preds = model.track(frame, persist=True)
+        >>>         camera.report(time.perf_counter() - started_at,
+        >>>                       len(preds[0].boxes))
+        >>>     ...
+        >>> camera.close()
+
+        Args:
+            - budget: 1초 동안 모델 실행에 쓸 수 있는 시간. (초)
+            - max_latency: 카메라의 최대 추론 간격. (초)
+            - min_interval: 카메라의 최소 추론 간격. (초)
+            - motion_gain: 움직인 픽셀 비율에 대한 가중치.
+            - track_gain: 트랙 하나에 대한 가중치.
+            - motion_size: 움직임을 측정할 때 프레임을 줄일 크기.
+                           (width, height)
+            - motion_threshold: 움직였다고 볼 밝기 변화. (0 ~ 255)
+            - decay: 움직임이 멎었을 때 움직임 값이 프레임마다 줄어드는
+                     비율. 움직임이 생기면 곧바로 반영하고, 멎으면
+                     천천히 줄입니다.
+            - initial_cost: 모델 실행 시간을 보고받기 전에 가정하는
+                            값. (초)
+            - smoothing: 모델 실행 시간의 지수 이동 평균 계수.
+            - idle_after: 이 시간 동안 프레임이 없는 카메라는 예산을
+                          나눌 때 제외합니다. (초)
+    """
+
+    def __init__(
+            self,
+            budget: float = 1.0,
+            max_latency: float = 1.0,
+            min_interval: float = 1 / 30,
+            motion_gain: float = 10.0,
+            track_gain: float = 0.25,
+            motion_size: Tuple[int, int] = (64, 36),
+            motion_threshold: int = 15,
+            decay: float = 0.1,
+            initial_cost: float = 0.05,
+            smoothing: float = 0.2,
+            idle_after: float = 5.0
+        ) -> None:
+
+        if budget <= 0:
+            msg = ('Expected budget is a positive number,'
+                   f' but a different value was provided.:{budget}')
+            raise ValueError(msg)
+        if not 0 <= min_interval <= max_latency:
+            msg = ('Expected 0 <= min_interval <= max_latency,'
+                   ' but a different value was provided.'
+                   f':{(min_interval, max_latency)}')
+            raise ValueError(msg)
+
+        self.budget = budget
+        self.max_latency = max_latency
+        self.min_interval = min_interval
+        self.motion_gain = motion_gain
+        self.track_gain = track_gain
+        self.motion_size = motion_size
+        self.motion_threshold = motion_threshold
+        self.decay = decay
+        self.initial_cost = initial_cost
+        self.smoothing = smoothing
+        self.idle_after = idle_after
+        self._cameras: Set['CameraSchedule'] = set()
+        self._lock = threading.Lock()
+
+    def register(self, name: str) -> 'CameraSchedule':
+        camera = CameraSchedule(self, name)
+        with self._lock:
+            self._cameras.add(camera)
+        return camera
+
+    def unregister(self, camera: 'CameraSchedule') -> None:
+        with self._lock:
+            self._cameras.discard(camera)
+
+    @property
+    def cameras(self) -> Set['CameraSchedule']:
+        with self._lock:
+            return set(self._cameras)
+
+    def interval(self, camera: 'CameraSchedule', now: float) -> float:
+
+        """ 현재 예산과 활동량으로 정한 camera의 추론 간격. (초) """
+
+        with self._lock:
+            demand = sum(
+                c.weight * c.cost for c in self._cameras
+                if c is camera or now - c.seen_at <= self.idle_after)
+        interval = demand / (self.budget * camera.weight)
+        return min(max(interval, self.min_interval), self.max_latency)
+
+
+class CameraSchedule():
+
+    """ 카메라 하나의 스케줄 상태. InferenceScheduler.register()로
+        만듭니다. 한 카메라의 메서드는 한 스레드에서만 호출해야
+        합니다.
+
+        Args:
+            - scheduler: 예산을 나눠 쓰는 스케줄러.
+            - name: 카메라 이름. 로그와 디버깅에만 사용됩니다.
+    """
+
+    def __init__(self, scheduler: InferenceScheduler, name: str) -> None:
+        self.name = name
+        self.cost = scheduler.initial_cost
+        self.motion = 0.0
+        self.n_tracks = 0
+        self.seen_at = time.monotonic()
+        self.inferred_at: Optional[float] = None
+        self._scheduler = scheduler
+        self._prev: Optional[np.ndarray] = None
+
+    @property
+    def weight(self) -> float:
+        scheduler = self._scheduler
+        return (1.0
+                + scheduler.motion_gain * self.motion
+                + scheduler.track_gain * self.n_tracks)
+
+    def observe(self, frame: np.ndarray) -> float:
+
+        """ 직전 프레임과 비교하여 움직임 값을 갱신하고 반환합니다. """
+
+        scheduler = self._scheduler
+        small = cv2.resize(
+            frame, scheduler.motion_size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        if self._prev is not None:
+            ratio = motion_ratio(self._prev, small, scheduler.motion_threshold)
+            self.motion = max(ratio, self.motion * (1 - scheduler.decay))
+        self._prev = small
+        return self.motion
+
+    def should_infer(
+            self,
+            frame: np.ndarray,
+            now: Optional[float] = None
+        ) -> bool:
+
+        """ frame을 추론할지 결정합니다. 참을 반환하면 추론한 것으로
+            간주하므로, 추론한 뒤 report()로 실행 시간을 알려 주세요.
+        """
+
+        now = time.monotonic() if now is None else now
+        self.seen_at = now
+        self.observe(frame)
+        if self.inferred_at is not None:
+            age = now - self.inferred_at
+            if age < self._scheduler.interval(self, now):
+                return False
+        self.inferred_at = now
+        return True
+
+    def report(self, elapsed: float, n_tracks: int = 0) -> None:
+
+        """ 추론에 걸린 시간(초)과 검출/추적된 객체 수를 알려 줍니다. """
+
+        alpha = self._scheduler.smoothing
+        self.cost += alpha * (elapsed - self.cost)
+        self.n_tracks = n_tracks
+
+    def close(self) -> None:
+        self._scheduler.unregister(self)
@@ -0,0 +1,105 @@
+"""
+utils.schedule의 InferenceScheduler 테스트입니다. tmp 디렉토리에서
+실행합니다.
+
+    $ cd tmp && python -m unittest utils.test_schedule
+"""
+
+
+import unittest
+
+import numpy as np
+
+from utils.schedule import InferenceScheduler, motion_ratio
+
+
+STATIC = np.full((72, 128, 3), 100, np.uint8)
+
+
+def moving(i: int) -> np.ndarray:
+    frame = STATIC.copy()
+    x = (i * 8) % 100
+    frame[20:50, x:x + 20] = 255
+    return frame
+
+
+def simulate(scheduler, cameras, seconds=20.0, fps=25, cost=0.05):
+
+    """ cameras: (CameraSchedule, 프레임 함수, 트랙 수) 배열. """
+
+    counts = [0] * len(cameras)
+    for i in range(int(seconds * fps)):
+        now = i / fps
+        for j, (camera, make_frame, n_tracks) in enumerate(cameras):
+            if camera.should_infer(make_frame(i), now):
+                counts[j] += 1
+                camera.report(cost, n_tracks)
+    return counts
+
+
+class InferenceSchedulerTests(unittest.TestCase):
+
+    def test_stays_within_the_budget(self):
+        scheduler = InferenceScheduler(budget=0.2, max_latency=5.0)
+        cameras = [
+            (scheduler.register(f'cam{i}'), moving, i) for i in range(4)]
+        counts = simulate(scheduler, cameras, seconds=20.0, cost=0.05)
+        # 카메라마다 첫 프레임은 간격과 무관하게 추론한다.
+        used = (sum(counts) - len(cameras)) * 0.05 / 20.0
+        self.assertLessEqual(used, 0.2 * 1.05)
+        self.assertGreaterEqual(used, 0.2 * 0.85)
+
+    def test_active_cameras_infer_more_often(self):
+        scheduler = InferenceScheduler(budget=0.2, max_latency=5.0)
+        cameras = [
+            (scheduler.register('static'), lambda i: STATIC, 0),
+            (scheduler.register('busy'), moving, 4)]
+        static, busy = simulate(scheduler, cameras)
+        self.assertGreater(busy, 1.5 * static)
+
+    def test_max_latency_wins_over_the_budget(self):
+        scheduler = InferenceScheduler(budget=0.01, max_latency=1.0)
+        camera = scheduler.register('cam')
+        count, = simulate(
+            scheduler, [(camera, lambda i: STATIC, 0)], seconds=10.0)
+        self.assertGreaterEqual(count, 10)
+
+    def test_min_interval_caps_the_rate(self):
+        scheduler = InferenceScheduler(budget=100.0, min_interval=0.2)
+        camera = scheduler.register('cam')
+        count, = simulate(scheduler, [(camera, moving, 10)], seconds=10.0)
+        self.assertLessEqual(count, 10 / 0.2 + 1)
+
+    def test_idle_and_closed_cameras_release_the_budget(self):
+        scheduler = InferenceScheduler(
+            budget=1.0, max_latency=10.0, idle_after=1.0)
+        camera = scheduler.register('cam')
+        other = scheduler.register('other')
+        camera.report(0.1)
+        other.report(0.1)
+        camera.seen_at = other.seen_at = 0.0
+        shared = scheduler.interval(camera, 0.5)
+        alone = scheduler.interval(camera, 5.0)
+        self.assertAlmostEqual(shared, 2 * alone)
+        other.close()
+        self.assertEqual(scheduler.cameras, {camera})
+
+    def test_rejects_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            InferenceScheduler(budget=0)
+        with self.assertRaises(ValueError):
+            InferenceScheduler(min_interval=2.0, max_latency=1.0)
+
+
+class MotionRatioTests(unittest.TestCase):
+
+    def test_counts_changed_pixels(self):
+        prev = np.zeros((10, 10), np.uint8)
+        curr = prev.copy()
+        curr[:5, :2] = 50
+        curr[5:, :2] = 10  # threshold 이하
+        self.assertEqual(motion_ratio(prev, curr, threshold=15), 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()